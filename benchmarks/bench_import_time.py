@@ -0,0 +1,55 @@
+"""
+Time `import breadt; from breadt import QMTTrader, Trader` in fresh interpreters.
+
+Usage:
+    python benchmarks/bench_import_time.py [--repeat 5] [--all]
+
+Each run starts a new Python process so nothing is served from sys.modules. --all also times resolving
+every name in breadt.__all__, i.e. the cost the lazy attribute table defers.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPET = """
+import time
+start = time.perf_counter()
+import breadt
+from breadt import QMTTrader, Trader
+{extra}
+print(time.perf_counter() - start)
+"""
+
+RESOLVE_ALL = "[getattr(breadt, name) for name in breadt.__all__]"
+
+
+def time_import(extra, repeat):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", SNIPPET.format(extra=extra)], env=env, check=True, capture_output=True, text=True
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--all", action="store_true")
+    args = parser.parse_args()
+
+    samples = time_import("", args.repeat)
+    print(f"import breadt + QMTTrader, Trader: median {statistics.median(samples):.3f}s, min {min(samples):.3f}s")
+    if args.all:
+        samples = time_import(RESOLVE_ALL, args.repeat)
+        print(f"resolving all of breadt.__all__:  median {statistics.median(samples):.3f}s, min {min(samples):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
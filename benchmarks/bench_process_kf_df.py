@@ -0,0 +1,59 @@
+"""
+Benchmark AlgoKalmanFilterProcessor.process_kf_df against the original rolling(...).apply(lambda) z-score.
+
+Usage:
+    python benchmarks/bench_process_kf_df.py [--rows 1000000] [--seed 2] [--legacy-rows 1000000]
+
+The legacy z-score calls a Python lambda per window and takes minutes on 1M rows; pass a smaller
+--legacy-rows to time it on a prefix and extrapolate linearly.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from breadt.algo_kalman_filter import AlgoKalmanFilterProcessor, _rolling_means, _rolling_zscore
+
+
+def legacy_zscore(spread, seed, fast, slow):
+    zscore = spread.rolling(int(seed * 2)).apply(lambda item: (item.iloc[-1] - item.mean()) / item.std())
+    return zscore, zscore.rolling(window=fast).mean(), zscore.rolling(window=slow).mean()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=float, default=2)
+    parser.add_argument("--legacy-rows", type=int, default=None)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    plus = np.exp(3 + np.cumsum(rng.normal(0, 0.01, args.rows)))
+    minus = np.exp(3 + np.cumsum(rng.normal(0, 0.01, args.rows)))
+    df = pd.DataFrame({"plus": plus, "minus": minus})
+
+    start = time.perf_counter()
+    result = AlgoKalmanFilterProcessor.process_kf_df(df, df["plus"], df["minus"], seed=args.seed)
+    print(f"process_kf_df, {args.rows} rows: {time.perf_counter() - start:.3f}s (spread + z-score + MAs)")
+
+    spread = result["kl_spread"]
+    start = time.perf_counter()
+    zscore = _rolling_zscore(spread.to_numpy(), int(args.seed * 2))
+    _rolling_means(zscore, (10, 30))
+    print(f"z-score + MAs: {time.perf_counter() - start:.3f}s")
+
+    legacy_rows = min(args.legacy_rows or args.rows, args.rows)
+    start = time.perf_counter()
+    legacy, legacy_fast, legacy_slow = legacy_zscore(spread.iloc[:legacy_rows], args.seed, 10, 30)
+    legacy_time = (time.perf_counter() - start) * args.rows / legacy_rows
+    print(f"legacy z-score + MAs: {legacy_time:.3f}s" + (" (extrapolated)" if legacy_rows < args.rows else ""))
+
+    new = result["kf_zscore_origin"].iloc[:legacy_rows]
+    print(f"max |z - legacy z|: {np.nanmax(np.abs(new.to_numpy() - legacy.to_numpy())):.2e}")
+    print(f"max |ma30 - legacy ma30|: {np.nanmax(np.abs(result['kf_zscore_ma30'].iloc[:legacy_rows] - legacy_slow)):.2e}")
+    print(f"NaN positions equal: {bool((new.isna() == legacy.isna()).all())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -18,31 +18,71 @@ from .trading_system_basic import (
     BreadtTaskType,
     BreadtTaskStatus,
 )
-from .debt import Debt
-from .rabbitmq_connector import RabbitMQConnector
-from .mysql_connector import MysqlConnector
-from .dingtalk_alert import DingTalkAlert
-from .stream_data_feed import StreamDataFeed
-from .fmin import (
-    is_after_trading_time,
-    is_in_trading_day,
-    is_in_trading_time,
-    get_code_volatility,
-    get_1m_raw_pressure_and_support,
-    check_ts_symbol,
-    is_debt_buy,
-    is_after_sys_working_time,
-)
-from .strategy import Strategy
-from .trade_executor import TradeExecutor
-from .redis_connector import RedisConnector
+import importlib
+
+# heavy submodules (statsmodels, tushare, clickhouse_connect, pika, redis, sqlalchemy, requests) are imported
+# on first attribute access via the module level __getattr__ below (PEP 562)
+_LAZY_ATTRIBUTES = {
+    "Debt": ".debt",
+    "RabbitMQConnector": ".rabbitmq_connector",
+    "MysqlConnector": ".mysql_connector",
+    "DingTalkAlert": ".dingtalk_alert",
+    "StreamDataFeed": ".stream_data_feed",
+    "is_after_trading_time": ".fmin",
+    "is_in_trading_day": ".fmin",
+    "is_in_trading_time": ".fmin",
+    "get_code_volatility": ".fmin",
+    "get_universe_volatility": ".fmin",
+    "DailyBarStore": ".fmin",
+    "get_daily_bar_store": ".fmin",
+    "get_1m_raw_pressure_and_support": ".fmin",
+    "get_1m_raw_pressure_and_support_batch": ".fmin",
+    "check_ts_symbol": ".fmin",
+    "is_debt_buy": ".fmin",
+    "is_after_sys_working_time": ".fmin",
+    "TradingCalendar": ".fmin",
+    "SymbolIndex": ".fmin",
+    "MarginTargetSet": ".fmin",
+    "VolumeAtPrice": ".fmin",
+    "Strategy": ".strategy",
+    "TradeExecutor": ".trade_executor",
+    "RedisConnector": ".redis_connector",
+    "ClickHouseConnector": ".clickhouse_connect_helper",
+    "get_coin_data_by_ct": ".milkt_coin_data_fetch",
+    "aggregate_data_by_ct": ".milkt_coin_data_fetch",
+    "fetch_and_normalize_coin_data": ".milkt_coin_data_fetch",
+    "AlgoKalmanFilterProcessor": ".algo_kalman_filter",
+    "KalmanSpreadState": ".algo_kalman_filter",
+    "AlgoMarkovRegressionProcessor": ".algo_markov_regression",
+    "MarkovRegimeReestimator": ".algo_markov_regression",
+    "MarkovRegimeFilter": ".algo_markov_regression",
+    "AlgorithmBaseETL": ".algo_base_etl",
+    "AdxState": ".algo_base_etl",
+    "VolatilityState": ".algo_base_etl",
+    "IndicatorCache": ".indicator_cache",
+    "PairUniverseScanner": ".pair_scanner",
+    "RegimeBatchRunner": ".regime_batch",
+    "MarkovRegimeCache": ".regime_cache",
+}
+
+_LAZY_SUBMODULES = {module.lstrip(".") for module in _LAZY_ATTRIBUTES.values()}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+        globals()[name] = value
+        return value
+
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-from .clickhouse_connect_helper import ClickHouseConnector
-from .milkt_coin_data_fetch import get_coin_data_by_ct, aggregate_data_by_ct,fetch_and_normalize_coin_data
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
 
-from .algo_kalman_filter import AlgoKalmanFilterProcessor
-from .algo_markov_regression import AlgoMarkovRegressionProcessor
-from .algo_base_etl import AlgorithmBaseETL
 
 __all__ = [
     "SharedCounter",
@@ -75,20 +115,37 @@ __all__ = [
     "BreadtTaskTimeType",
     "BreadtTaskType",
     "get_code_volatility",
+    "get_universe_volatility",
+    "DailyBarStore",
+    "get_daily_bar_store",
     "BreadtTaskStatus",
     "get_1m_raw_pressure_and_support",
+    "get_1m_raw_pressure_and_support_batch",
     "QMTTraderV2",
     "check_ts_symbol",
     "RedisConnector",
     "is_debt_buy",
     "ClickHouseConnector",
     "is_after_sys_working_time",
+    "TradingCalendar",
+    "SymbolIndex",
+    "MarginTargetSet",
+    "VolumeAtPrice",
     
     "get_coin_data_by_ct",
     "aggregate_data_by_ct",
     "fetch_and_normalize_coin_data",
 
     "AlgoKalmanFilterProcessor",
+    "KalmanSpreadState",
     "AlgoMarkovRegressionProcessor",
+    "MarkovRegimeReestimator",
+    "MarkovRegimeFilter",
     "AlgorithmBaseETL",
+    "AdxState",
+    "VolatilityState",
+    "IndicatorCache",
+    "PairUniverseScanner",
+    "RegimeBatchRunner",
+    "MarkovRegimeCache",
 ]
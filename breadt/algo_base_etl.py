@@ -1,5 +1,7 @@
+import json
 import numpy as np
 import pandas as pd
+from scipy.signal import lfilter
 
 
 class AlgorithmBaseETL:
@@ -27,24 +29,90 @@ class AlgorithmBaseETL:
         df["volatility"] = volatility
         return df
 
+    @staticmethod
+    def _log_returns(close):
+        close = np.asarray(close, dtype=np.float64)
+        returns = np.zeros(close.shape)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns[1:] = np.log(close[1:] / close[:-1])
+        # a zero or missing close gives a NaN/inf return; zero it so it cannot poison the cumulative sums
+        returns[~np.isfinite(returns)] = 0
+        return returns
+
+    @staticmethod
+    def cal_volatility_multi(df, windows=(36,), dtype=np.float64, scale=np.sqrt(6)):
+        """
+        Calculate the rolling volatility of the 'close' column for several windows at once.
+
+        The log returns are computed once and every window is derived from their cumulative sums, giving
+        the same values as cal_volatility for each window. Non-finite returns (from a missing or zero close)
+        count as 0, where cal_volatility reports NaN while such a return is in the window. The input is not
+        modified.
+
+        Parameters:
+        df (pd.DataFrame, pd.Series or np.ndarray): DataFrame containing the 'close' prices, or the close prices.
+        windows (list of int): The rolling window sizes. Default is (36,).
+        dtype (np.dtype, optional): dtype of the output columns, e.g. np.float32 to halve memory. Default is np.float64.
+        scale (float, optional): Factor applied to the rolling standard deviation. Default is sqrt(6).
+
+        Returns:
+        pd.DataFrame: One 'volatility_{window}' column per window, indexed like the input.
+        """
+        close = df["close"] if isinstance(df, pd.DataFrame) else df
+        index = close.index if isinstance(close, pd.Series) else None
+        returns = AlgorithmBaseETL._log_returns(close)
+
+        n = len(returns)
+        # center the returns so the cumulative sums stay small; the variance is shift invariant
+        centered = returns - returns.mean() if n else returns
+        s1 = np.concatenate([[0.0], np.cumsum(centered)])
+        s2 = np.concatenate([[0.0], np.cumsum(centered * centered)])
+
+        columns = {}
+        for window in windows:
+            volatility = np.full(n, np.nan)
+            if 1 < window <= n:
+                sum1 = s1[window:] - s1[:-window]
+                sum2 = s2[window:] - s2[:-window]
+                var = np.maximum((sum2 - sum1 * sum1 / window) / (window - 1), 0)
+                volatility[window - 1:] = np.sqrt(var) * scale
+            columns[f"volatility_{window}"] = volatility.astype(dtype, copy=False)
+
+        return pd.DataFrame(columns, index=index)
+
     @staticmethod
     def rma(cps, days=8):
         """
-        Calculate the Running Moving Average (RMA) of a list of closing prices.
+        Calculate the Running Moving Average (RMA) of a series of closing prices.
+
+        The recurrence ema[i] = ((days - 1) * ema[i - 1] + 2 * cp[i]) / (days + 1), seeded with
+        the first value, is evaluated as a first-order recursive filter instead of a Python loop.
+        Leading NaNs (e.g. symbols listed later in a panel) are skipped: each column is seeded with its
+        first valid value and the positions before it stay NaN.
         Args:
-            cps (list): A list of closing prices.
+            cps (list or np.ndarray): Closing prices, 1-D or 2-D (time x symbol, filtered along axis 0).
             days (int, optional): The number of days to calculate the RMA over. Default is 8.
         Returns:
-            list: A list containing the RMA values for each closing price in cps.
+            np.ndarray: The RMA values, same shape as cps.
         """
-        emas = [0 for i in range(len(cps))]  # 创造一个和cps一样大小的集合
-        for i, cp in enumerate(cps):
-            if i == 0:
-                emas[i] = cp
-            else:
-                emas[i] = ((days - 1) * emas[i - 1] + 2 * cp) / (days + 1)
+        cps = np.asarray(cps, dtype=np.float64)
+        if cps.shape[0] == 0:
+            return cps.copy()
 
-        emas = [v for v in emas]
+        missing = np.isnan(cps)
+        first = np.argmax(~missing, axis=0)
+        seed = np.take_along_axis(cps, np.expand_dims(first, 0), axis=0)[0]
+        leading = np.arange(cps.shape[0]).reshape((-1,) + (1,) * (cps.ndim - 1)) < first
+        if leading.any():
+            # holding the seed value before the first observation keeps the filter output equal to it
+            cps = np.where(leading, seed, cps)
+
+        alpha = 2.0 / (days + 1)
+        # y[i] = alpha * x[i] + (1 - alpha) * y[i - 1], zi makes y[0] == x[0]
+        zi = ((1 - alpha) * seed)[np.newaxis, ...]
+        emas, _ = lfilter([alpha], [1.0, alpha - 1.0], cps, axis=0, zi=zi)
+        if leading.any():
+            emas[leading] = np.nan
         return emas
 
     @staticmethod
@@ -96,36 +164,104 @@ class AlgorithmBaseETL:
         return signal, sec_plus, sec_minus
 
     @staticmethod
-    def get_adx_trend(adx, threshold, plus, minus):
+    def _rolling_gap(values, rolling_length):
+        """
+        values - values.rolling(rolling_length).mean() on a 1-D array, NaN for the first rolling_length - 1 rows.
+        """
+        gap = np.full(len(values), np.nan)
+        if len(values) >= rolling_length:
+            means = np.lib.stride_tricks.sliding_window_view(values, rolling_length).mean(axis=-1)
+            gap[rolling_length - 1:] = values[rolling_length - 1:] - means
+        return gap
+
+    @staticmethod
+    def get_adx_features(close, high, low, adx_trend_threshold=25, length=8, smoothing=8, rolling_length=3, as_frame=True):
+        """
+        Compute every derived ADX feature from a single get_adx_resolution run.
+        This replaces separate calls to get_adx_trend_idx, get_adx_trend_idx_rising and get_di_rising, each of
+        which recomputes the resolution.
+        Parameters:
+        close (pd.Series or np.ndarray): Closing prices.
+        high (pd.Series or np.ndarray): High prices.
+        low (pd.Series or np.ndarray): Low prices.
+        adx_trend_threshold (int, optional): Threshold value for ADX trend. Default is 25.
+        length (int, optional): Length of the period for ADX calculation. Default is 8.
+        smoothing (int, optional): Smoothing factor for ADX calculation. Default is 8.
+        rolling_length (int, optional): The window length for the rising rolling means. Default is 3.
+        as_frame (bool, optional): Return a DataFrame (indexed like close if it is a Series) instead of a
+            numpy structured array. Default is True.
+        Returns:
+        pd.DataFrame or np.ndarray: Fields 'adx', 'plus', 'minus', 'trend' (int8), 'adx_rising', 'di_gap'
+        (plus - minus) and 'di_rising', one row per bar. 'adx_rising' equals get_adx_trend_idx_rising(...)[1:],
+        as the legacy series carries one extra leading element.
+        """
+        index = close.index if isinstance(close, pd.Series) else None
+        adx, plus, minus = AlgorithmBaseETL.get_adx_resolution(
+            np.asarray(close, dtype=np.float64),
+            np.asarray(high, dtype=np.float64),
+            np.asarray(low, dtype=np.float64),
+            length=length,
+            smoothing=smoothing,
+        )
+        di_gap = plus - minus
+
+        features = np.empty(
+            len(adx),
+            dtype=[
+                ("adx", np.float64),
+                ("plus", np.float64),
+                ("minus", np.float64),
+                ("trend", np.int8),
+                ("adx_rising", np.float64),
+                ("di_gap", np.float64),
+                ("di_rising", np.float64),
+            ],
+        )
+        features["adx"] = adx
+        features["plus"] = plus
+        features["minus"] = minus
+        features["trend"] = AlgorithmBaseETL._adx_trend_array(adx, adx_trend_threshold, plus, minus)
+        # the legacy adx_rising is built on [0] + adx
+        features["adx_rising"] = AlgorithmBaseETL._rolling_gap(np.concatenate([[0.0], adx]), rolling_length)[1:]
+        features["di_gap"] = di_gap
+        features["di_rising"] = AlgorithmBaseETL._rolling_gap(di_gap, rolling_length)
+
+        if as_frame:
+            return pd.DataFrame(features, index=index)
+        return features
+
+    @staticmethod
+    def _adx_trend_array(adx, threshold, plus, minus):
+        """
+        Vectorized form of the get_adx_trend rule: 1 / -1 where adx > threshold and DI+ is above / below DI-, else 0.
+        """
+        di_gap = np.asarray(plus, dtype=np.float64) - np.asarray(minus, dtype=np.float64)
+        trend = np.where(di_gap > 0, 1, np.where(di_gap < 0, -1, 0)).astype(np.int8)
+        trend[~(np.asarray(adx, dtype=np.float64) > threshold)] = 0
+        return trend
+
+    @staticmethod
+    def get_adx_trend(adx, threshold, plus, minus, as_list=False):
         """
         Determines the trend based on the Average Directional Index (ADX) and 
         the Plus and Minus Directional Indicators.
         Parameters:
-        adx (list of float): List of ADX values.
+        adx (list or np.ndarray of float): ADX values.
         threshold (float): Threshold value to determine if the ADX indicates a trend.
-        plus (list of float): List of Plus Directional Indicator values.
-        minus (list of float): List of Minus Directional Indicator values.
+        plus (list or np.ndarray of float): Plus Directional Indicator values.
+        minus (list or np.ndarray of float): Minus Directional Indicator values.
+        as_list (bool, optional): Return the legacy list of Python ints instead of an array. Default is False.
         Returns:
-        list of int: List indicating the trend for each ADX value:
+        np.ndarray of int8: The trend for each ADX value:
                      1 for an uptrend,
                      -1 for a downtrend,
                      0 for no trend.
         """
-        emas = [0 for i in range(len(adx))]
-
-        for i, adx_value in enumerate(adx):
-            if adx[i] > threshold:
-                if plus[i] - minus[i] > 0:
-                    emas[i] = 1
-                elif minus[i] - plus[i] > 0:
-                    emas[i] = -1
-                else:
-                    emas[i] = 0
-
-        return emas
+        trend = AlgorithmBaseETL._adx_trend_array(adx, threshold, plus, minus)
+        return trend.tolist() if as_list else trend
 
     @staticmethod
-    def get_adx_trend_idx(close, high, low, adx_trend_threshold=25, length=8, smoothing=8):
+    def get_adx_trend_idx(close, high, low, adx_trend_threshold=25, length=8, smoothing=8, as_list=False):
         """
         Calculate the ADX trend index for given price data.
         Parameters:
@@ -135,13 +271,14 @@ class AlgorithmBaseETL:
         adx_trend_threshold (int, optional): Threshold value for ADX trend. Default is 25.
         length (int, optional): Length of the period for ADX calculation. Default is 8.
         smoothing (int, optional): Smoothing factor for ADX calculation. Default is 8.
+        as_list (bool, optional): Return the legacy list of Python ints instead of an array. Default is False.
         Returns:
-        list: A list containing the ADX trend index values, with an initial value of 0.
+        np.ndarray of int8: The ADX trend index values, with an initial value of 0.
         """
         adx_signal, adx_plus, adx_minus = AlgorithmBaseETL.get_adx_resolution(
             close, high, low, length=length, smoothing=smoothing
         )
-        adx_trend = AlgorithmBaseETL.get_adx_trend(adx_signal, adx_trend_threshold, adx_plus, adx_minus)
+        adx_trend = AlgorithmBaseETL.get_adx_trend(adx_signal, adx_trend_threshold, adx_plus, adx_minus, as_list=as_list)
         return adx_trend
 
     @staticmethod
@@ -182,4 +319,370 @@ class AlgorithmBaseETL:
         Returns:
             pd.Series: A pandas Series representing the difference between the di_gap and its rolling mean.
         """
-        return di_gap - di_gap.rolling(rolling_length).mean() 
\ No newline at end of file
+        return di_gap - di_gap.rolling(rolling_length).mean() 
+
+    @staticmethod
+    def get_adx_resolution_panel(close, high, low, length=8, smoothing=8):
+        """
+        Panel variant of get_adx_resolution, computing every symbol of a (time x symbol) panel in one pass.
+        Each column equals get_adx_resolution on that column's bars from its first valid row onwards, so
+        NaN-padded (later listed) symbols are handled; rows before a listing are NaN.
+        Parameters:
+        close (np.ndarray or pd.DataFrame): (time x symbol) closing prices.
+        high (np.ndarray or pd.DataFrame): (time x symbol) high prices.
+        low (np.ndarray or pd.DataFrame): (time x symbol) low prices.
+        length (int, optional): The period length for the ADX calculation. Default is 8.
+        smoothing (int, optional): The smoothing period for the ADX calculation. Default is 8.
+        Returns:
+        tuple: (signal, sec_plus, sec_minus), each shaped like close; DataFrames if close is a DataFrame.
+        """
+        frame = close if isinstance(close, pd.DataFrame) else None
+        close = np.asarray(close, dtype=np.float64)
+        high = np.asarray(high, dtype=np.float64)
+        low = np.asarray(low, dtype=np.float64)
+
+        valid = ~(np.isnan(close) | np.isnan(high) | np.isnan(low))
+        pair_valid = valid[1:] & valid[:-1]
+
+        tr = np.max([high - low, high - close, close - low], axis=0)[1:]
+        up = np.diff(high, axis=0)
+        down = -np.diff(low, axis=0)
+        tr = np.where(pair_valid, tr, np.nan)
+        plus_dm = np.where(pair_valid, np.where(up > down, up, 0), np.nan)
+        minus_dm = np.where(pair_valid, np.where(down > up, down, 0), np.nan)
+
+        true_range = AlgorithmBaseETL.rma(tr, length)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            plus = np.nan_to_num(100 * np.divide(AlgorithmBaseETL.rma(plus_dm, length), true_range))
+            minus = np.nan_to_num(100 * np.divide(AlgorithmBaseETL.rma(minus_dm, length), true_range))
+        plus = np.where(pair_valid, plus, np.nan)
+        minus = np.where(pair_valid, minus, np.nan)
+
+        di_sum = plus + minus
+        signal = 100 * AlgorithmBaseETL.rma(np.abs(plus - minus) / np.where(di_sum == 0, 1, di_sum), smoothing)
+
+        first = np.argmax(valid, axis=0)
+        listed = np.flatnonzero(valid.any(axis=0))
+
+        results = []
+        for values in (signal, plus, minus):
+            padded = np.full(close.shape, np.nan)
+            padded[1:] = values
+            padded[first[listed], listed] = 0
+            if frame is not None:
+                padded = pd.DataFrame(padded, index=frame.index, columns=frame.columns)
+            results.append(padded)
+
+        return tuple(results)
+
+    @staticmethod
+    def get_adx_panel(close, high, low, adx_trend_threshold=25, length=8, smoothing=8, rolling_length=3):
+        """
+        Compute ADX signal, DI+, DI-, trend and adx_rising for every symbol of a (time x symbol) panel.
+        Parameters:
+        close (np.ndarray or pd.DataFrame): (time x symbol) closing prices, NaN before a symbol is listed.
+        high (np.ndarray or pd.DataFrame): (time x symbol) high prices.
+        low (np.ndarray or pd.DataFrame): (time x symbol) low prices.
+        adx_trend_threshold (int, optional): Threshold value for ADX trend. Default is 25.
+        length (int, optional): Length of the period for ADX calculation. Default is 8.
+        smoothing (int, optional): Smoothing factor for ADX calculation. Default is 8.
+        rolling_length (int, optional): The window length for the rolling mean. Default is 3.
+        Returns:
+        dict: 'signal', 'plus', 'minus', 'trend' (int8, 0 before listing) and 'adx_rising', each shaped
+        like close (DataFrames if close is a DataFrame). 'adx_rising' is aligned with the bars, i.e. it
+        equals get_adx_trend_idx_rising(...)[1:] per column, which carries one extra leading element.
+        """
+        frame = close if isinstance(close, pd.DataFrame) else None
+        signal, plus, minus = AlgorithmBaseETL.get_adx_resolution_panel(
+            np.asarray(close, dtype=np.float64),
+            np.asarray(high, dtype=np.float64),
+            np.asarray(low, dtype=np.float64),
+            length=length,
+            smoothing=smoothing,
+        )
+
+        trend = AlgorithmBaseETL._adx_trend_array(signal, adx_trend_threshold, plus, minus)
+
+        # the legacy rising series is built on [0] + signal, so one extra zero precedes each listing
+        listed_rows = ~np.isnan(signal)
+        first = np.argmax(listed_rows, axis=0)
+        listed = np.flatnonzero(listed_rows.any(axis=0))
+        extended = np.full((signal.shape[0] + 1,) + signal.shape[1:], np.nan)
+        extended[1:] = signal
+        extended[first[listed], listed] = 0
+        adx_rising = (extended - pd.DataFrame(extended).rolling(rolling_length).mean().to_numpy())[1:]
+
+        result = {"signal": signal, "plus": plus, "minus": minus, "trend": trend, "adx_rising": adx_rising}
+        if frame is not None:
+            result = {k: pd.DataFrame(v, index=frame.index, columns=frame.columns) for k, v in result.items()}
+        return result
+
+class AdxState:
+    """
+    Incremental ADX state for live bars.
+
+    Holds the last RMA values of TR, +DM, -DM and DX so that each new bar is processed in O(1),
+    producing the same signal/plus/minus/trend as AlgorithmBaseETL.get_adx_resolution and
+    AlgorithmBaseETL.get_adx_trend on the full history.
+    Methods:
+        update(close, high, low) -> tuple:
+        from_history(close, high, low, ...) -> AdxState:
+        to_dict() / from_dict(d), to_json() / from_json(s):
+    """
+
+    def __init__(self, length=8, smoothing=8, adx_trend_threshold=25):
+        self.length = length
+        self.smoothing = smoothing
+        self.adx_trend_threshold = adx_trend_threshold
+        self.count = 0
+        self.prev_high = None
+        self.prev_low = None
+        self.tr = None
+        self.plus_dm = None
+        self.minus_dm = None
+        self.dx = None
+        self.signal = 0.0
+        self.plus = 0.0
+        self.minus = 0.0
+        self.trend = 0
+
+    @staticmethod
+    def _rma_step(prev, value, days):
+        if prev is None:
+            return value
+        return ((days - 1) * prev + 2 * value) / (days + 1)
+
+    def update(self, close, high, low):
+        """
+        Feed one bar into the state.
+        Parameters:
+        close (float): Closing price of the bar.
+        high (float): High price of the bar.
+        low (float): Low price of the bar.
+        Returns:
+        tuple: (signal, plus, minus, trend) for this bar. The first bar returns zeros, matching the
+        padding of the batch functions.
+        """
+        close, high, low = float(close), float(high), float(low)
+        self.count += 1
+
+        if self.prev_high is None:
+            self.prev_high, self.prev_low = high, low
+            return self.signal, self.plus, self.minus, self.trend
+
+        tr = max(high - low, high - close, close - low)
+        up = high - self.prev_high
+        down = self.prev_low - low
+        self.prev_high, self.prev_low = high, low
+
+        self.tr = self._rma_step(self.tr, tr, self.length)
+        self.plus_dm = self._rma_step(self.plus_dm, up if up > down else 0.0, self.length)
+        self.minus_dm = self._rma_step(self.minus_dm, down if down > up else 0.0, self.length)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            plus = float(np.nan_to_num(100 * np.divide(self.plus_dm, self.tr)))
+            minus = float(np.nan_to_num(100 * np.divide(self.minus_dm, self.tr)))
+
+        di_sum = plus + minus
+        dx = abs(plus - minus) / (1 if di_sum == 0 else di_sum)
+        self.dx = self._rma_step(self.dx, dx, self.smoothing)
+
+        self.signal = self.dx * 100
+        self.plus = plus
+        self.minus = minus
+        self.trend = self._trend(self.signal, self.plus, self.minus)
+
+        return self.signal, self.plus, self.minus, self.trend
+
+    def _trend(self, signal, plus, minus):
+        if signal > self.adx_trend_threshold:
+            if plus - minus > 0:
+                return 1
+            elif minus - plus > 0:
+                return -1
+        return 0
+
+    @classmethod
+    def from_history(cls, close, high, low, length=8, smoothing=8, adx_trend_threshold=25):
+        """
+        Seed a state from a batch of historical bars, equivalent to feeding them one by one.
+        Parameters:
+        close (np.ndarray): Array of closing prices.
+        high (np.ndarray): Array of high prices.
+        low (np.ndarray): Array of low prices.
+        length (int, optional): The period length for the ADX calculation. Default is 8.
+        smoothing (int, optional): The smoothing period for the ADX calculation. Default is 8.
+        adx_trend_threshold (int, optional): Threshold value for ADX trend. Default is 25.
+        Returns:
+        AdxState: A state ready to receive the next live bar.
+        """
+        close = np.asarray(close, dtype=np.float64)
+        high = np.asarray(high, dtype=np.float64)
+        low = np.asarray(low, dtype=np.float64)
+
+        state = cls(length=length, smoothing=smoothing, adx_trend_threshold=adx_trend_threshold)
+        state.count = len(close)
+        if len(close) == 0:
+            return state
+
+        state.prev_high, state.prev_low = float(high[-1]), float(low[-1])
+        if len(close) == 1:
+            return state
+
+        tr = np.max([high - low, high - close, close - low], axis=0)[1:]
+        up = np.diff(high)
+        down = -np.diff(low)
+        true_range = AlgorithmBaseETL.rma(tr, length)
+        plus_dm = AlgorithmBaseETL.rma(np.where(up > down, up, 0), length)
+        minus_dm = AlgorithmBaseETL.rma(np.where(down > up, down, 0), length)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            plus = np.nan_to_num(100 * np.divide(plus_dm, true_range))
+            minus = np.nan_to_num(100 * np.divide(minus_dm, true_range))
+        di_sum = plus + minus
+        dx = AlgorithmBaseETL.rma(np.abs(plus - minus) / np.where(di_sum == 0, 1, di_sum), smoothing)
+
+        state.tr = float(true_range[-1])
+        state.plus_dm = float(plus_dm[-1])
+        state.minus_dm = float(minus_dm[-1])
+        state.dx = float(dx[-1])
+        state.signal = state.dx * 100
+        state.plus = float(plus[-1])
+        state.minus = float(minus[-1])
+        state.trend = state._trend(state.signal, state.plus, state.minus)
+        return state
+
+    def to_dict(self):
+        """
+        Serialize the state to a plain dict so a restarted process can resume without replaying history.
+        """
+        return {
+            "length": self.length,
+            "smoothing": self.smoothing,
+            "adx_trend_threshold": self.adx_trend_threshold,
+            "count": self.count,
+            "prev_high": self.prev_high,
+            "prev_low": self.prev_low,
+            "tr": self.tr,
+            "plus_dm": self.plus_dm,
+            "minus_dm": self.minus_dm,
+            "dx": self.dx,
+            "signal": self.signal,
+            "plus": self.plus,
+            "minus": self.minus,
+            "trend": self.trend,
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        """
+        Restore a state produced by to_dict.
+        """
+        state = cls(length=d["length"], smoothing=d["smoothing"], adx_trend_threshold=d["adx_trend_threshold"])
+        for key in ("count", "prev_high", "prev_low", "tr", "plus_dm", "minus_dm", "dx", "signal", "plus", "minus", "trend"):
+            setattr(state, key, d[key])
+        return state
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_json(cls, s):
+        return cls.from_dict(json.loads(s))
+
+
+class VolatilityState:
+    """
+    Incremental multi-window rolling volatility, matching AlgorithmBaseETL.cal_volatility_multi.
+
+    Keeps the last max(windows) log returns in a ring buffer together with per-window running sums,
+    so each new close is processed in O(windows).
+    Methods:
+        update(close) -> np.ndarray:
+        volatility() -> np.ndarray:
+        from_history(close, windows, ...) -> VolatilityState:
+    """
+
+    def __init__(self, windows=(36,), scale=np.sqrt(6)):
+        self.windows = np.asarray(windows, dtype=np.int64)
+        self.scale = scale
+        self.size = int(self.windows.max())
+        self.buffer = np.zeros(self.size)
+        self.pos = 0
+        self.count = 0
+        self.last_close = None
+        self.sum1 = np.zeros(len(self.windows))
+        self.sum2 = np.zeros(len(self.windows))
+
+    def update(self, close):
+        """
+        Feed one close price into the state.
+        Parameters:
+        close (float): The new closing price.
+        Returns:
+        np.ndarray: The updated volatility for each window, NaN until the window is filled.
+        """
+        close = float(close)
+        ret = 0.0
+        if self.last_close is not None:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ret = float(np.log(np.float64(close) / self.last_close))
+            if not np.isfinite(ret):
+                ret = 0.0
+        self.last_close = close
+
+        expired = np.where(self.count >= self.windows, self.buffer[(self.pos - self.windows) % self.size], 0.0)
+        self.sum1 += ret - expired
+        self.sum2 += ret * ret - expired * expired
+
+        self.buffer[self.pos] = ret
+        self.pos = (self.pos + 1) % self.size
+        self.count += 1
+
+        if self.pos == 0:
+            # resync the running sums once per buffer cycle to stop rounding drift, amortized O(windows)
+            self._resync()
+
+        return self.volatility()
+
+    def _resync(self):
+        ordered = np.roll(self.buffer, -self.pos)
+        for k, window in enumerate(self.windows):
+            tail = ordered[self.size - min(window, self.count):]
+            self.sum1[k] = tail.sum()
+            self.sum2[k] = (tail * tail).sum()
+
+    def volatility(self):
+        """
+        Returns:
+        np.ndarray: The current volatility for each window, NaN until the window is filled.
+        """
+        windows = self.windows.astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            var = np.maximum((self.sum2 - self.sum1 * self.sum1 / windows) / (windows - 1), 0)
+        return np.where((self.count >= self.windows) & (self.windows > 1), np.sqrt(var) * self.scale, np.nan)
+
+    @classmethod
+    def from_history(cls, close, windows=(36,), scale=np.sqrt(6)):
+        """
+        Seed a state from historical closes, equivalent to feeding them one by one.
+        Parameters:
+        close (pd.Series or np.ndarray): Historical closing prices.
+        windows (list of int): The rolling window sizes. Default is (36,).
+        scale (float, optional): Factor applied to the rolling standard deviation. Default is sqrt(6).
+        Returns:
+        VolatilityState: A state ready to receive the next close.
+        """
+        close = np.asarray(close, dtype=np.float64)
+        state = cls(windows=windows, scale=scale)
+        if len(close) == 0:
+            return state
+
+        returns = AlgorithmBaseETL._log_returns(close)
+        state.count = len(returns)
+        state.last_close = float(close[-1])
+        state.pos = state.count % state.size
+        tail = returns[-state.size:]
+        state.buffer = np.roll(np.concatenate([np.zeros(state.size - len(tail)), tail]), state.pos)
+        state._resync()
+        return state
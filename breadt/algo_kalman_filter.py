@@ -1,6 +1,61 @@
-import statsmodels.api as sm
-from pykalman import KalmanFilter
+import json
+from collections import deque
+
 import numpy as np
+import pandas as pd
+
+
+def _hedge_ratio_update(beta, alpha, p00, p01, p11, xt, yt, r):
+    """
+    Measurement update of the 2-state hedge-ratio filter for one observation y_t = beta * x_t + alpha.
+    """
+    # P h' with h = [x_t, 1]
+    ph0 = p00 * xt + p01
+    ph1 = p01 * xt + p11
+    s = xt * ph0 + ph1 + r
+    k0 = ph0 / s
+    k1 = ph1 / s
+    e = yt - (beta * xt + alpha)
+    return beta + k0 * e, alpha + k1 * e, p00 - k0 * ph0, p01 - k0 * ph1, p11 - k1 * ph1
+
+
+def _rolling_zscore(values, window):
+    """
+    (last - mean) / std (ddof=1) of every trailing window, NaN for incomplete windows or windows containing NaN.
+
+    Built from pandas' rolling mean and std, which update the window moments incrementally (O(n) for any
+    window length) with compensated summation.
+    """
+    if window < 2 or len(values) < window:
+        return np.full(len(values), np.nan)
+
+    series = pd.Series(values, dtype=np.float64)
+    rolling = series.rolling(window)
+    return ((series - rolling.mean()) / rolling.std()).to_numpy()
+
+
+def _rolling_means(values, windows):
+    """
+    Trailing means for several window lengths from one pass of cumulative sums.
+
+    Like rolling(w).mean(), a window containing NaN or +-inf yields NaN.
+    Returns:
+    list: One array per window length.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(finite, values, 0.0))))
+    invalid = np.concatenate(([0], np.cumsum(~finite)))
+
+    means = []
+    for window in windows:
+        mean = np.full(len(values), np.nan)
+        if 0 < window <= len(values):
+            total = sums[window:] - sums[:-window]
+            clean = (invalid[window:] - invalid[:-window]) == 0
+            mean[window - 1:] = np.where(clean, total / window, np.nan)
+        means.append(mean)
+    return means
 
 
 class AlgoKalmanFilterProcessor:
@@ -9,9 +64,13 @@ class AlgoKalmanFilterProcessor:
     Methods:
         get_kalman_filter_state(plus, minus, observation_convariance=0.5):
                 observation_convariance (float, optional): The observation covariance. Default is 0.5.
+        kalman_filter_hedge_ratio(y, x, observation_covariance=0.5, transition_covariance=0.000001, store_covariances=True):
         get_kalman_filter_spread(plus, minus, observation_convariance=0.5):
                 observation_convariance (float, optional): The observation covariance. Default is 0.5.
+        get_kalman_filter_spread_batch(plus, minus, observation_convariance=0.5, transition_covariance=0.000001):
         cal_half_life(spread, seed=2):
+        cal_half_life_rolling(spread, window=None, seed=2):
+        cal_half_life_batch(spreads, seed=2, mean_reverting_only=False):
         process_kf_df(df, plus, minus, seed=2, fast=10, slow=30):
                 fast (int, optional): The window size for the fast rolling mean of the z-score. Default is 10.
                 slow (int, optional): The window size for the slow rolling mean of the z-score. Default is 30.
@@ -20,18 +79,19 @@ class AlgoKalmanFilterProcessor:
     """
 
     @staticmethod
-    def get_kalman_filter_state(plus, minus, observation_convariance=0.5):
+    def get_kalman_filter_state(plus, minus, observation_convariance=0.5, store_covariances=True):
         """
         Applies a Kalman filter to the given time series data.
 
         Parameters:
         plus (pd.Series or np.ndarray): The time series data for the 'plus' variable.
         minus (pd.Series or np.ndarray): The time series data for the 'minus' variable.
+        store_covariances (bool, optional): Keep the covariance stack; None is returned when False. Default is True.
 
         Returns:
         tuple: A tuple containing:
             - state_means (np.ndarray): The estimated state means from the Kalman filter.
-            - state_covs (np.ndarray): The estimated state covariances from the Kalman filter.
+            - state_covs (np.ndarray or None): The estimated state covariances from the Kalman filter.
 
 
         kf = KalmanFilter(
@@ -53,21 +113,64 @@ class AlgoKalmanFilterProcessor:
             #代表仅对这两个参数进行训练
         )
         """
-        obs_mat = sm.add_constant(np.log(minus).values, prepend=False)[:, np.newaxis]
-        trans_cov = 1e-5 / (1 - 1e-5) * np.eye(2)
-
-        kf = KalmanFilter(
-            n_dim_obs=1,
-            n_dim_state=2,
-            initial_state_mean=np.ones(2),
-            initial_state_covariance=np.ones((2, 2)),
-            transition_matrices=np.eye(2),
-            observation_matrices=obs_mat,
+        state_means, state_covs = AlgoKalmanFilterProcessor.kalman_filter_hedge_ratio(
+            np.log(np.asarray(plus, dtype=np.float64)),
+            np.log(np.asarray(minus, dtype=np.float64)),
             observation_covariance=observation_convariance,
-            transition_covariance=0.000001 * np.eye(2),
+            store_covariances=store_covariances,
         )
+        return state_means, state_covs
+
+    @staticmethod
+    def kalman_filter_hedge_ratio(
+        y, x, observation_covariance=0.5, transition_covariance=0.000001, store_covariances=True
+    ):
+        """
+        Kalman filter for the regression y_t = beta_t * x_t + alpha_t + e_t with random-walk beta and alpha.
+
+        This is the model get_kalman_filter_state used to hand to pykalman (identity transition, scalar
+        observation, initial state mean ones(2) and covariance ones((2, 2))) written out for the 2-state
+        case, so each step is a handful of scalar operations instead of generic matrix algebra.
+
+        Parameters:
+        y (np.ndarray): Observations, e.g. log prices of the 'plus' leg.
+        x (np.ndarray): Regressor, e.g. log prices of the 'minus' leg.
+        observation_covariance (float, optional): Variance of e_t. Default is 0.5.
+        transition_covariance (float, optional): Variance of the random-walk steps of beta and alpha. Default is 1e-6.
+        store_covariances (bool, optional): Keep the (n, 2, 2) covariance stack; when False only O(1)
+            state is kept per step and None is returned in its place. Default is True.
+
+        Returns:
+        tuple: A tuple containing:
+            - state_means (np.ndarray): (n, 2) filtered [beta, alpha].
+            - state_covs (np.ndarray or None): (n, 2, 2) filtered covariances.
+        """
+        y = np.asarray(y, dtype=np.float64)
+        x = np.asarray(x, dtype=np.float64)
+        n = len(y)
+
+        state_means = np.empty((n, 2))
+        state_covs = np.empty((n, 2, 2)) if store_covariances else None
+
+        beta, alpha = 1.0, 1.0
+        p00, p01, p11 = 1.0, 1.0, 1.0
+        r, q = float(observation_covariance), float(transition_covariance)
+
+        for t, (xt, yt) in enumerate(zip(x.tolist(), y.tolist())):
+            if t > 0:
+                p00 += q
+                p11 += q
+
+            beta, alpha, p00, p01, p11 = _hedge_ratio_update(beta, alpha, p00, p01, p11, xt, yt, r)
+
+            state_means[t, 0] = beta
+            state_means[t, 1] = alpha
+            if store_covariances:
+                state_covs[t, 0, 0] = p00
+                state_covs[t, 0, 1] = p01
+                state_covs[t, 1, 0] = p01
+                state_covs[t, 1, 1] = p11
 
-        state_means, state_covs = kf.filter(np.log(plus).values)
         return state_means, state_covs
 
     @staticmethod
@@ -87,38 +190,168 @@ class AlgoKalmanFilterProcessor:
         Returns:
             np.ndarray: The calculated spread.
         """
-        state_means, state_covs = AlgoKalmanFilterProcessor.get_kalman_filter_state(
-            plus, minus, observation_convariance=observation_convariance
+        state_means, _ = AlgoKalmanFilterProcessor.get_kalman_filter_state(
+            plus, minus, observation_convariance=observation_convariance, store_covariances=False
         )
         return np.log(plus) - np.log(minus) * state_means[:, 0] - state_means[:, 1]
 
+    @staticmethod
+    def get_kalman_filter_spread_batch(plus, minus, observation_convariance=0.5, transition_covariance=0.000001):
+        """
+        Calculate the Kalman filter spread for many pairs at once.
+
+        Runs the same 2-state filter as get_kalman_filter_spread for every column, stepping all pairs together
+        in one vectorized recursion over time.
+
+        Args:
+            plus (np.ndarray or pd.DataFrame): (time x pairs) prices of the 'plus' legs.
+            minus (np.ndarray or pd.DataFrame): (time x pairs) prices of the 'minus' legs, column-aligned with plus.
+            observation_convariance (float, optional): The observation covariance. Default is 0.5.
+            transition_covariance (float, optional): Variance of the random-walk state steps. Default is 1e-6.
+
+        Returns:
+            np.ndarray or pd.DataFrame: (time x pairs) spreads; a DataFrame shaped like plus if plus is one.
+        """
+        frame = plus if isinstance(plus, pd.DataFrame) else None
+        y = np.log(np.asarray(plus, dtype=np.float64))
+        x = np.log(np.asarray(minus, dtype=np.float64))
+        if y.shape != x.shape:
+            raise ValueError(f"plus and minus must have the same shape, got {y.shape} and {x.shape}")
+
+        n_pairs = y.shape[1]
+        beta, alpha = np.ones(n_pairs), np.ones(n_pairs)
+        p00, p01, p11 = np.ones(n_pairs), np.ones(n_pairs), np.ones(n_pairs)
+        r, q = float(observation_convariance), float(transition_covariance)
+
+        spreads = np.empty(y.shape)
+        for t in range(y.shape[0]):
+            if t > 0:
+                p00 += q
+                p11 += q
+            beta, alpha, p00, p01, p11 = _hedge_ratio_update(beta, alpha, p00, p01, p11, x[t], y[t], r)
+            spreads[t] = y[t] - x[t] * beta - alpha
+
+        if frame is not None:
+            return pd.DataFrame(spreads, index=frame.index, columns=frame.columns)
+        return spreads
+
+    @staticmethod
+    def _half_life_regression(spread):
+        """
+        The (spread_lag, spread_ret) rows regressed by cal_half_life, along axis 0; the first row repeats the second.
+        """
+        spread = np.asarray(spread, dtype=np.float64)
+        spread_lag = np.empty(spread.shape)
+        spread_lag[1:] = spread[:-1]
+        spread_lag[0] = spread[0]
+        spread_ret = spread - spread_lag
+        spread_ret[0] = spread_ret[1]
+        return spread_lag, spread_ret
+
+    @staticmethod
+    def _half_life_from_slope(slope, seed, mean_reverting_only=False):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            halflife = np.round(-np.log(seed) / slope)
+        undefined = ~np.isfinite(halflife)
+        if mean_reverting_only:
+            undefined |= ~(slope < 0)
+        return np.where(undefined, np.nan, np.maximum(halflife, 1))
+
     @staticmethod
     def cal_half_life(spread, seed=2):
         """
         Calculate the half-life of a mean-reverting time series.
 
         The half-life is the time it takes for a time series to revert halfway back to its mean.
-        This function uses an Ordinary Least Squares (OLS) regression to estimate the half-life.
+        This function estimates it from the slope of an Ordinary Least Squares (OLS) regression of the
+        spread changes on the lagged spread, computed in closed form (cov / var).
 
         Parameters:
-        spread (pd.Series): The time series data for which the half-life is to be calculated.
+        spread (pd.Series or np.ndarray): The time series data for which the half-life is to be calculated.
         seed (int, optional): The base of the logarithm used in the calculation. Default is 2.
 
         Returns:
         int: The calculated half-life of the time series. If the calculated half-life is less than or equal to 0, it returns 1.
         """
-        spread_lag = spread.shift(1)
-        spread_lag.iloc[0] = spread_lag.iloc[1]
-        spread_ret = spread - spread_lag
-        spread_ret.iloc[0] = spread_ret.iloc[1]
-        spread_lag2 = sm.add_constant(spread_lag)
-        model = sm.OLS(spread_ret, spread_lag2)
-        res = model.fit()
-        halflife = int(round(-np.log(seed) / res.params[1], 0))
+        spread_lag, spread_ret = AlgoKalmanFilterProcessor._half_life_regression(spread)
+        lag_centered = spread_lag - spread_lag.mean()
+        slope = (lag_centered * (spread_ret - spread_ret.mean())).sum() / (lag_centered * lag_centered).sum()
+        halflife = int(round(-np.log(seed) / slope, 0))
         if halflife <= 0:
             halflife = 1
         return halflife
 
+    @staticmethod
+    def cal_half_life_rolling(spread, window=None, seed=2):
+        """
+        Calculate the half-life at every bar from the cal_half_life regression over a trailing window.
+
+        The regression sums are maintained as cumulative sums, so the whole series costs O(n). With
+        window=None the window is expanding and the last value equals cal_half_life(spread).
+
+        Parameters:
+        spread (pd.Series or np.ndarray): The spread series.
+        window (int, optional): Number of trailing regression rows (bars); None for an expanding window. Default is None.
+        seed (int, optional): The base of the logarithm used in the calculation. Default is 2.
+
+        Returns:
+        pd.Series or np.ndarray: Half-life per bar (clipped to at least 1), NaN until the window is filled or
+        where the slope is undefined; a Series with the spread's index if spread is a Series.
+        """
+        index = spread.index if isinstance(spread, pd.Series) else None
+        n = len(spread)
+        halflife = np.full(n, np.nan)
+
+        if n >= 2:
+            spread_lag, spread_ret = AlgoKalmanFilterProcessor._half_life_regression(spread)
+            # slope is shift invariant; centering keeps the cumulative sums well conditioned
+            spread_lag = spread_lag - spread_lag.mean()
+            spread_ret = spread_ret - spread_ret.mean()
+
+            sums = [
+                np.concatenate([[0.0], np.cumsum(v)])
+                for v in (spread_lag, spread_ret, spread_lag * spread_lag, spread_lag * spread_ret)
+            ]
+            end = np.arange(1, n + 1)
+            count = end if window is None else np.minimum(end, window)
+            sx, sy, sxx, sxy = (c[end] - c[end - count] for c in sums)
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                var = sxx - sx * sx / count
+                slope = (sxy - sx * sy / count) / var
+            slope[(var <= 0) | (count < (2 if window is None else max(window, 2)))] = np.nan
+            halflife = AlgoKalmanFilterProcessor._half_life_from_slope(slope, seed)
+
+        if index is not None:
+            return pd.Series(halflife, index=index)
+        return halflife
+
+    @staticmethod
+    def cal_half_life_batch(spreads, seed=2, mean_reverting_only=False):
+        """
+        Calculate cal_half_life for many spreads at once.
+
+        Parameters:
+        spreads (np.ndarray or pd.DataFrame): (time x pairs) spreads.
+        seed (int, optional): The base of the logarithm used in the calculation. Default is 2.
+        mean_reverting_only (bool, optional): Return NaN instead of 1 for spreads whose regression slope is not
+            negative, i.e. that do not mean-revert. Default is False.
+
+        Returns:
+        np.ndarray or pd.Series: Half-life per column (clipped to at least 1), NaN where the slope is undefined;
+        a Series indexed by the columns if spreads is a DataFrame.
+        """
+        columns = spreads.columns if isinstance(spreads, pd.DataFrame) else None
+        spread_lag, spread_ret = AlgoKalmanFilterProcessor._half_life_regression(spreads)
+        lag_centered = spread_lag - spread_lag.mean(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = (lag_centered * (spread_ret - spread_ret.mean(axis=0))).sum(axis=0) / (lag_centered * lag_centered).sum(axis=0)
+        halflife = AlgoKalmanFilterProcessor._half_life_from_slope(slope, seed, mean_reverting_only)
+
+        if columns is not None:
+            return pd.Series(halflife, index=columns)
+        return halflife
+
     @staticmethod
     def process_kf_df(df, plus, minus, seed=2, fast=10, slow=30):
         """
@@ -138,9 +371,139 @@ class AlgoKalmanFilterProcessor:
         df['kl_spread'] = AlgoKalmanFilterProcessor.get_kalman_filter_spread(plus, minus, 0.5)
 
         # @Note 不再计算半衰期，直接传入半衰期
-        df['kf_zscore_origin'] = df['kl_spread'].rolling(int(seed * 2) ).apply(lambda item: (item.iloc[-1] - item.mean()) / item.std())
+        df['kf_zscore_origin'] = _rolling_zscore(df['kl_spread'].to_numpy(dtype=np.float64), int(seed * 2))
+
+        ma_fast, ma_slow = _rolling_means(df['kf_zscore_origin'].to_numpy(), (fast, slow))
+        df[f'kf_zscore_ma{fast}'] = ma_fast
+        df[f'kf_zscore_ma{slow}'] = ma_slow
+
+        return df
+
+
+class KalmanSpreadState:
+    """
+    Online version of AlgoKalmanFilterProcessor.process_kf_df for live pairs trading.
+
+    Holds the current hedge-ratio state mean and covariance plus the last int(seed * 2) spreads, so each
+    (plus, minus) price pair is processed in constant time and yields the same 'kl_spread' and (up to
+    rounding) 'kf_zscore_origin' values as process_kf_df on the full history.
+    Methods:
+        update(plus, minus) -> tuple:
+        from_history(plus, minus, seed=2, ...) -> KalmanSpreadState:
+        to_dict() / from_dict(d), to_json() / from_json(s), to_bytes() / from_bytes(b):
+    """
+
+    def __init__(self, seed=2, observation_covariance=0.5, transition_covariance=0.000001):
+        self.seed = seed
+        self.window = int(seed * 2)
+        self.observation_covariance = float(observation_covariance)
+        self.transition_covariance = float(transition_covariance)
+        self.count = 0
+        self.beta, self.alpha = 1.0, 1.0
+        self.p00, self.p01, self.p11 = 1.0, 1.0, 1.0
+        self.spreads = deque(maxlen=self.window)
+
+    def update(self, plus, minus):
+        """
+        Feed one price pair into the filter.
+        Parameters:
+        plus (float): Price of the 'plus' leg.
+        minus (float): Price of the 'minus' leg.
+        Returns:
+        tuple: (spread, zscore); zscore is NaN until the rolling window is filled.
+        """
+        yt = float(np.log(plus))
+        xt = float(np.log(minus))
+
+        if self.count > 0:
+            self.p00 += self.transition_covariance
+            self.p11 += self.transition_covariance
+        self.beta, self.alpha, self.p00, self.p01, self.p11 = _hedge_ratio_update(
+            self.beta, self.alpha, self.p00, self.p01, self.p11, xt, yt, self.observation_covariance
+        )
+        self.count += 1
+
+        spread = yt - xt * self.beta - self.alpha
+        self.spreads.append(spread)
+        return spread, self.zscore()
+
+    def zscore(self):
+        """
+        Returns:
+        float: (last spread - window mean) / window std, NaN until the window is filled.
+        """
+        if self.window < 2 or len(self.spreads) < self.window:
+            return np.nan
+        window = np.fromiter(self.spreads, dtype=np.float64, count=self.window)
+        return (window[-1] - window.mean()) / window.std(ddof=1)
+
+    @classmethod
+    def from_history(cls, plus, minus, seed=2, observation_covariance=0.5, transition_covariance=0.000001):
+        """
+        Seed a state from historical prices, equivalent to feeding them one by one.
+        Parameters:
+        plus (pd.Series or np.ndarray): Historical prices of the 'plus' leg.
+        minus (pd.Series or np.ndarray): Historical prices of the 'minus' leg.
+        seed (int, optional): The half-life; the z-score window is int(seed * 2). Default is 2.
+        Returns:
+        KalmanSpreadState: A state ready to receive the next price pair.
+        """
+        state = cls(seed=seed, observation_covariance=observation_covariance, transition_covariance=transition_covariance)
+        y = np.log(np.asarray(plus, dtype=np.float64))
+        x = np.log(np.asarray(minus, dtype=np.float64))
+        if len(y) == 0:
+            return state
+
+        state_means, state_covs = AlgoKalmanFilterProcessor.kalman_filter_hedge_ratio(
+            y, x, observation_covariance=observation_covariance, transition_covariance=transition_covariance
+        )
+        state.count = len(y)
+        state.beta, state.alpha = (float(v) for v in state_means[-1])
+        state.p00, state.p01, state.p11 = (float(v) for v in state_covs[-1][[0, 0, 1], [0, 1, 1]])
+        spreads = y - x * state_means[:, 0] - state_means[:, 1]
+        state.spreads.extend(spreads[-state.window:].tolist())
+        return state
+
+    def to_dict(self):
+        """
+        Serialize the state to a plain dict so a restarted process can resume without replaying the day.
+        """
+        return {
+            "seed": self.seed,
+            "observation_covariance": self.observation_covariance,
+            "transition_covariance": self.transition_covariance,
+            "count": self.count,
+            "state_mean": [self.beta, self.alpha],
+            "state_cov": [self.p00, self.p01, self.p11],
+            "spreads": list(self.spreads),
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        """
+        Restore a state produced by to_dict.
+        """
+        state = cls(
+            seed=d["seed"],
+            observation_covariance=d["observation_covariance"],
+            transition_covariance=d["transition_covariance"],
+        )
+        state.count = d["count"]
+        state.beta, state.alpha = d["state_mean"]
+        state.p00, state.p01, state.p11 = d["state_cov"]
+        state.spreads.extend(d["spreads"])
+        return state
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_json(cls, s):
+        return cls.from_dict(json.loads(s))
 
-        df[f'kf_zscore_ma{fast}'] = df['kf_zscore_origin'].rolling(window=fast).mean()
-        df[f'kf_zscore_ma{slow}'] = df['kf_zscore_origin'].rolling(window=slow).mean()
+    def to_bytes(self):
+        return self.to_json().encode("utf-8")
 
-        return df
\ No newline at end of file
+    @classmethod
+    def from_bytes(cls, b):
+        return cls.from_json(b.decode("utf-8"))
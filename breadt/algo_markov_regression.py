@@ -1,4 +1,6 @@
 from statsmodels.tsa.regime_switching.markov_regression import MarkovRegression
+import json
+
 import numpy as np
 import pandas as pd
 
@@ -8,12 +10,21 @@ class AlgoMarkovRegressionProcessor:
     A processor class for performing Markov Regression and analyzing p-values with a rolling window smoothing.
     Methods
     -------
-    markov_regression(t, freq="2h", k_regimes=3)
-    get_pval_rolling_window(pval, stime, regime=2, rolling_window=36, freq="2h")
+    markov_regression(t, freq="2h", k_regimes=3, start_params=None, maxiter=100, cov_type="approx", return_probabilities=False)
+    get_pval_rolling_window(pval, stime, regime=2, rolling_window=36, freq="2h", ..., cache=None, symbol=None)
     """
 
     @staticmethod
-    def markov_regression(t, freq="2h", k_regimes=3):
+    def regime_scaling(k_regimes):
+        """
+        Weights turning regime probabilities into the regime indicator: [0, 0.7, 1] for 3 regimes, else 0..k-1.
+        """
+        return [0, 0.7, 1] if k_regimes == 3 else list(range(k_regimes))
+
+    @staticmethod
+    def markov_regression(
+        t, freq="2h", k_regimes=3, start_params=None, maxiter=100, cov_type="approx", return_probabilities=False
+    ):
         """
         Perform Markov Regression on the given time series data.
 
@@ -21,26 +32,52 @@ class AlgoMarkovRegressionProcessor:
         t (pd.Series or pd.DataFrame): The time series data to be analyzed.
         freq (str, optional): The frequency of the time series data. Default is "2h".
         k_regimes (int, optional): The number of regimes to be used in the Markov Regression. Default is 3.
+        start_params (array-like, optional): Parameters of a previous fit to warm-start from; the EM
+            pre-iterations are skipped when given. Default is None (cold start).
+        maxiter (int, optional): Maximum number of optimizer iterations. Default is 100.
+        cov_type (str, optional): Parameter covariance passed to fit; "none" skips the Hessian when only the
+            regimes are needed. Default is "approx".
+        return_probabilities (bool, optional): Return the raw (nobs, k_regimes) smoothed probability ndarray,
+            one row per non-NaN observation, instead of the regime series. Default is False.
 
         Returns:
-        pd.Series: A series with the reindexed regimes based on the input time series index.
+        pd.Series: A series with the reindexed regimes based on the input time series index
+            (np.ndarray of smoothed probabilities if return_probabilities is True).
         MarkovRegressionResults: The fitted Markov Regression model results.
         """
-        mr = MarkovRegression(t.dropna(), k_regimes=k_regimes, freq=freq)
-        mr_fitted = mr.fit()
+        endog = t.dropna()
+        mr = MarkovRegression(endog, k_regimes=k_regimes, freq=freq)
+        fit_kwargs = {"maxiter": maxiter, "cov_type": cov_type}
+        if start_params is not None:
+            fit_kwargs.update(start_params=np.asarray(start_params), em_iter=0)
+        mr_fitted = mr.fit(**fit_kwargs)
         #   scaling so that the middle tier of the regime acts as decay if k_regimes = 3; add stuff together to make prob function that will act as indicator for regimes
-        scaling = [0, 0.7, 1] if k_regimes == 3 else range(k_regimes)
+        scaling = AlgoMarkovRegressionProcessor.regime_scaling(k_regimes)
 
-        regimes = (
-            (mr_fitted.smoothed_marginal_probabilities)
-            .apply(lambda x: x * scaling, axis=1)
-            .apply(np.sum, axis=1)
-        )
+        # (nobs, k) array straight from the smoother, without the wrapped DataFrame
+        probabilities = mr_fitted.smoother_results.smoothed_marginal_probabilities.T
+        if return_probabilities:
+            return probabilities, mr_fitted
+
+        regimes = pd.Series(probabilities @ np.asarray(scaling, dtype=np.float64), index=endog.index)
 
         return regimes.reindex(t.index), mr_fitted
 
     @staticmethod
-    def get_pval_rolling_window(pval, stime, regime=2, rolling_window=36, freq="2h"):
+    def get_pval_rolling_window(
+        pval,
+        stime,
+        regime=2,
+        rolling_window=36,
+        freq="2h",
+        start_params=None,
+        smoothed_start_params=None,
+        maxiter=100,
+        cov_type="approx",
+        return_models=False,
+        cache=None,
+        symbol=None,
+    ):
         """
         Applies a Markov switching model to p-values with a rolling window smoothing.
 
@@ -49,11 +86,33 @@ class AlgoMarkovRegressionProcessor:
         stime (array-like): Array of corresponding time indices for the p-values.
         regime (int, optional): Number of regimes for the Markov switching model. Default is 2.
         rolling_window (int, optional): Window size for the rolling mean smoothing. Default is 36.
+        start_params (array-like, optional): Warm-start parameters for the first fit. Default is None.
+        smoothed_start_params (array-like, optional): Warm-start parameters for the second fit. Default is None.
+        maxiter (int, optional): Maximum number of optimizer iterations per fit. Default is 100.
+        cov_type (str, optional): Parameter covariance passed to both fits. Default is "approx".
+        return_models (bool, optional): Also return both fitted results. Default is False.
+        cache (MarkovRegimeCache, optional): On-disk cache of previous fits. An unchanged input reuses the
+            cached regimes without fitting (unless return_models is True), an input extending a cached one
+            warm-starts both fits from the cached parameters. Default is None.
+        symbol (str, optional): The symbol the p-values belong to; required with cache. Default is None.
 
         Returns:
         pd.Series: A pandas Series with the smoothed regimes, indexed by the original time indices.
+        If return_models is True, a tuple (smoothed regimes, first fit results, second fit results).
         """
 
+        if cache is not None:
+            if symbol is None:
+                raise ValueError("symbol is required when a cache is given")
+            pval, stime = list(pval), list(stime)
+            status, entry = cache.lookup(symbol, pval, stime, regime, freq, rolling_window)
+            if status == "hit" and not return_models:
+                return entry["regimes"].copy()
+            if entry is not None:
+                start_params = entry["params"] if start_params is None else start_params
+                if smoothed_start_params is None:
+                    smoothed_start_params = entry["smoothed_params"]
+
         m = pd.Series(data=list(pval), index=stime)
 
         #  applies a transformation to the p-value to make it more useful for the markov switching model
@@ -61,12 +120,19 @@ class AlgoMarkovRegressionProcessor:
 
         #  does first round of markov switching model fitting;
         #  either 2 regimes or 3. 3 is for the middle 'high variance but nothing's really happening' tier,
-        regimes, mr_model = AlgoMarkovRegressionProcessor.markov_regression(pv, freq=freq, k_regimes=regime)
+        regimes, mr_model = AlgoMarkovRegressionProcessor.markov_regression(
+            pv, freq=freq, k_regimes=regime, start_params=start_params, maxiter=maxiter, cov_type=cov_type
+        )
 
         #   applies rolling mean smoothing and runs it through a second regime fitting, this time with only two regimes
         ms = regimes.rolling(rolling_window).mean()
         smoothed_regimes, smoothed_mr_model = AlgoMarkovRegressionProcessor.markov_regression(
-            ms.dropna(), freq=freq, k_regimes=regime
+            ms.dropna(),
+            freq=freq,
+            k_regimes=regime,
+            start_params=smoothed_start_params,
+            maxiter=maxiter,
+            cov_type=cov_type,
         )
 
         smoothed_regimes_lag_removed = pd.Series(
@@ -74,4 +140,222 @@ class AlgoMarkovRegressionProcessor:
             index=smoothed_regimes.index,
         )
 
+        if cache is not None and mr_model.mle_retvals.get("converged", True) and smoothed_mr_model.mle_retvals.get(
+            "converged", True
+        ):
+            cache.store(
+                symbol,
+                pval,
+                stime,
+                regime,
+                freq,
+                rolling_window,
+                mr_model.params,
+                smoothed_mr_model.params,
+                smoothed_regimes_lag_removed,
+            )
+
+        if return_models:
+            return smoothed_regimes_lag_removed, mr_model, smoothed_mr_model
         return smoothed_regimes_lag_removed
+
+
+class MarkovRegimeReestimator:
+    """
+    Periodic re-estimation of AlgoMarkovRegressionProcessor.get_pval_rolling_window with warm starts.
+
+    Each refit starts both Markov fits from the parameters of the previous refit (skipping the EM
+    pre-iterations and the covariance computation), which converges in a fraction of the cold-start time
+    and keeps the regime labels stable between refreshes. If a warm-started fit does not converge the
+    refit falls back to a cold start.
+    Methods:
+        refit(pval, stime) -> pd.Series:
+    """
+
+    def __init__(self, regime=2, rolling_window=36, freq="2h", window=None, maxiter=50, cold_maxiter=100):
+        """
+        Parameters:
+        regime (int, optional): Number of regimes for the Markov switching model. Default is 2.
+        rolling_window (int, optional): Window size for the rolling mean smoothing. Default is 36.
+        freq (str, optional): The frequency of the time series data. Default is "2h".
+        window (int, optional): Fit on the last `window` observations (sliding); None for the full,
+            expanding history. Default is None.
+        maxiter (int, optional): Iteration cap for warm-started fits. Default is 50.
+        cold_maxiter (int, optional): Iteration cap for cold starts. Default is 100.
+        """
+        self.regime = regime
+        self.rolling_window = rolling_window
+        self.freq = freq
+        self.window = window
+        self.maxiter = maxiter
+        self.cold_maxiter = cold_maxiter
+        self.params = None
+        self.smoothed_params = None
+        self.converged = None
+
+    def refit(self, pval, stime):
+        """
+        Re-estimate the smoothed regimes on the latest data.
+        Parameters:
+        pval (array-like): Array of p-values, full history up to now.
+        stime (array-like): Array of corresponding time indices for the p-values.
+        Returns:
+        pd.Series: The smoothed regimes, as returned by get_pval_rolling_window.
+        """
+        pval, stime = list(pval), list(stime)
+        if self.window is not None:
+            pval, stime = pval[-self.window:], stime[-self.window:]
+
+        result = None
+        if self.params is not None:
+            result = AlgoMarkovRegressionProcessor.get_pval_rolling_window(
+                pval,
+                stime,
+                regime=self.regime,
+                rolling_window=self.rolling_window,
+                freq=self.freq,
+                start_params=self.params,
+                smoothed_start_params=self.smoothed_params,
+                maxiter=self.maxiter,
+                cov_type="none",
+                return_models=True,
+            )
+            if not all(model.mle_retvals["converged"] for model in result[1:]):
+                result = None
+
+        if result is None:
+            result = AlgoMarkovRegressionProcessor.get_pval_rolling_window(
+                pval,
+                stime,
+                regime=self.regime,
+                rolling_window=self.rolling_window,
+                freq=self.freq,
+                maxiter=self.cold_maxiter,
+                cov_type="none",
+                return_models=True,
+            )
+
+        regimes, mr_model, smoothed_mr_model = result
+        self.params = np.asarray(mr_model.params)
+        self.smoothed_params = np.asarray(smoothed_mr_model.params)
+        self.converged = mr_model.mle_retvals["converged"] and smoothed_mr_model.mle_retvals["converged"]
+        return regimes
+
+
+
+class MarkovRegimeFilter:
+    """
+    Hamilton filter for a fitted markov_regression model, advancing regime probabilities without refitting.
+
+    Holds the regime transition matrix, the per-regime mean and variance of a fitted MarkovRegression
+    (constant-only regression, as built by markov_regression) and the current filtered probabilities.
+    Each new observation costs O(k_regimes^2). The indicator uses the same scaling as markov_regression,
+    but is based on filtered rather than smoothed probabilities, since smoothing needs future data.
+    Methods:
+        update(y) -> tuple:
+        update_batch(ys) -> tuple:
+        from_result(mr_fitted) -> MarkovRegimeFilter:
+        to_dict() / from_dict(d), to_json() / from_json(s):
+    """
+
+    def __init__(self, transition, means, variances, probabilities, scaling=None):
+        """
+        Parameters:
+        transition (array-like): (k, k) matrix, transition[i, j] = P(regime i at t | regime j at t - 1).
+        means (array-like): Mean of the observation in each regime.
+        variances (array-like): Variance of the observation in each regime.
+        probabilities (array-like): Current filtered regime probabilities.
+        scaling (array-like, optional): Regime weights; AlgoMarkovRegressionProcessor.regime_scaling(k) if None.
+        """
+        self.transition = np.asarray(transition, dtype=np.float64)
+        self.means = np.asarray(means, dtype=np.float64)
+        self.variances = np.asarray(variances, dtype=np.float64)
+        self.probabilities = np.asarray(probabilities, dtype=np.float64)
+        k_regimes = len(self.means)
+        self.scaling = np.asarray(
+            AlgoMarkovRegressionProcessor.regime_scaling(k_regimes) if scaling is None else scaling, dtype=np.float64
+        )
+
+    @classmethod
+    def from_result(cls, mr_fitted, scaling=None):
+        """
+        Build a filter positioned after the last observation of a fitted model.
+        Parameters:
+        mr_fitted (MarkovRegressionResults): Result returned by markov_regression.
+        scaling (array-like, optional): Regime weights. Default is the markov_regression scaling.
+        Returns:
+        MarkovRegimeFilter: A filter ready for the next observation.
+        """
+        model = mr_fitted.model
+        params = np.asarray(mr_fitted.params, dtype=np.float64)
+        k_regimes = model.k_regimes
+        positions = np.arange(len(params))
+
+        means = params[positions[model.parameters["exog"]]]
+        if len(means) != k_regimes:
+            raise ValueError("MarkovRegimeFilter supports constant-only Markov regressions")
+        variances = params[positions[model.parameters["variance"]]]
+        if len(variances) == 1:
+            variances = np.repeat(variances, k_regimes)
+
+        transition = np.asarray(model.regime_transition_matrix(params))[..., -1]
+        probabilities = np.asarray(mr_fitted.filtered_marginal_probabilities)[-1]
+        return cls(transition, means, variances, probabilities, scaling=scaling)
+
+    def update(self, y):
+        """
+        Advance the filter by one observation.
+        Parameters:
+        y (float): The new observation, on the same scale as the series the model was fitted on. NaN only
+            propagates the regime probabilities through the transition matrix.
+        Returns:
+        tuple: (filtered regime probabilities, scaled regime indicator).
+        """
+        predicted = self.transition @ self.probabilities
+        if np.isnan(y):
+            self.probabilities = predicted
+        else:
+            likelihood = np.exp(-0.5 * (y - self.means) ** 2 / self.variances) / np.sqrt(2 * np.pi * self.variances)
+            joint = likelihood * predicted
+            self.probabilities = joint / joint.sum()
+        return self.probabilities.copy(), float(self.probabilities @ self.scaling)
+
+    def update_batch(self, ys):
+        """
+        Advance the filter over several observations.
+        Parameters:
+        ys (array-like): New observations in time order.
+        Returns:
+        tuple: ((n, k) filtered probabilities, (n,) scaled regime indicators).
+        """
+        ys = np.asarray(ys, dtype=np.float64)
+        probabilities = np.empty((len(ys), len(self.means)))
+        for i, y in enumerate(ys):
+            probabilities[i] = self.update(y)[0]
+        return probabilities, probabilities @ self.scaling
+
+    def to_dict(self):
+        """
+        Serialize the filter to a plain dict so it can be restored after a restart.
+        """
+        return {
+            "transition": self.transition.tolist(),
+            "means": self.means.tolist(),
+            "variances": self.variances.tolist(),
+            "probabilities": self.probabilities.tolist(),
+            "scaling": self.scaling.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        """
+        Restore a filter produced by to_dict.
+        """
+        return cls(d["transition"], d["means"], d["variances"], d["probabilities"], scaling=d["scaling"])
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_json(cls, s):
+        return cls.from_dict(json.loads(s))
@@ -1,14 +1,30 @@
+import bisect
 import datetime
+import os
+import threading
+import time
 from os.path import exists
-import tushare as ts
 import pandas as pd
 import math
 import numpy as np
-from .clickhouse_connect_helper import ClickHouseConnector
 
 TUSHARE_KEY = "32edd62d8ec424bd141e2992ffd0725c51b246e205115188d1576229"
-ts.set_token(TUSHARE_KEY)
-pro = ts.pro_api()
+DAILY_BAR_ROOT = os.environ.get("BREADT_DAILY_BAR_ROOT", os.path.join(os.path.expanduser("~"), ".breadt", "daily_bars"))
+_pro = None
+_daily_bar_store = None
+
+
+def get_pro_api():
+    """
+    Return the tushare pro client, creating it on first use instead of at import time.
+    """
+    global _pro
+    if _pro is None:
+        import tushare as ts
+
+        ts.set_token(TUSHARE_KEY)
+        _pro = ts.pro_api()
+    return _pro
 
 
 class StockBasicInfo(object):
@@ -17,20 +33,32 @@ class StockBasicInfo(object):
     def __init__(self):
         raise RuntimeError("Call instance() instead")
 
+    @classmethod
+    def _load(cls, config_name):
+        from .clickhouse_connect_helper import ClickHouseConnector
+
+        ck = ClickHouseConnector()
+
+        df_fund_list = ck.read_2_pandas(
+            config_name, 'quote', "select ts_code,symbol from tushare_fund_basic"
+        )
+        df_stock_list = ck.read_2_pandas(
+            config_name, 'quote', "select ts_code,symbol from tushare_stock_basic"
+        )
+
+        return pd.concat([df_fund_list, df_stock_list])
+
     @classmethod
     def instance(cls, config_name):
         if cls._instance is None:
-            ck = ClickHouseConnector()
+            cls._instance = cls._load(config_name)
 
-            df_fund_list = ck.read_2_pandas(
-                config_name, 'quote', "select ts_code,symbol from tushare_fund_basic"
-            )
-            df_stock_list = ck.read_2_pandas(
-                config_name, 'quote', "select ts_code,symbol from tushare_stock_basic"
-            )
-
-            cls._instance = pd.concat([df_fund_list, df_stock_list])
+        return cls._instance
 
+    @classmethod
+    def refresh(cls, config_name):
+        # load first and swap afterwards, so readers keep the old frame meanwhile
+        cls._instance = cls._load(config_name)
         return cls._instance
 
 class StockCalendarInfo(object):
@@ -39,28 +67,175 @@ class StockCalendarInfo(object):
     def __init__(self):
         raise RuntimeError("Call instance() instead")
 
+    @classmethod
+    def _load(cls, config_name):
+        from .clickhouse_connect_helper import ClickHouseConnector
+
+        ck = ClickHouseConnector()
+
+        return ck.read_2_pandas(
+            config_name, 'stock', "select * from milkt_stock_calendar"
+        )
+
     @classmethod
     def instance(cls, config_name):
         if cls._instance is None:
-            ck = ClickHouseConnector()
+            cls._instance = cls._load(config_name)
 
-            df_cal = ck.read_2_pandas(
-                config_name, 'stock', "select * from milkt_stock_calendar"
-            )
+        return cls._instance
 
-            cls._instance = df_cal
+    @classmethod
+    def refresh(cls, config_name):
+        cls._instance = cls._load(config_name)
+        return cls._instance
+
+
+def _date_key(value) -> int:
+    """
+    Normalize a date given as YYYYMMDD int/str, "YYYY-MM-DD" or date/datetime to a YYYYMMDD int.
+    """
+    if isinstance(value, (datetime.date, pd.Timestamp)):
+        return value.year * 10000 + value.month * 100 + value.day
+    return int(str(value).replace("-", "")[:8])
+
+
+class TradingCalendar(object):
+    """
+    In-memory trading calendar built once per day from StockCalendarInfo.
+
+    Open days are kept as a sorted int array of YYYYMMDD dates plus a set, so is_trading_day is a set lookup
+    and next/prev_trading_day are binary searches; nothing touches disk or the database per call. Dates
+    are accepted as YYYYMMDD ints/strings, "YYYY-MM-DD" strings or date/datetime objects, and returned as
+    YYYYMMDD ints.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
 
+    def __init__(self, df_cal):
+        cal_date = df_cal["cal_date"].astype(str).str.replace("-", "").str[:8].astype(int).to_numpy()
+        is_open = df_cal["is_open"].astype(int).to_numpy() > 0
+
+        self.open_days = np.unique(cal_date[is_open])
+        self._open_set = frozenset(self.open_days.tolist())
+        self.loaded_on = datetime.date.today()
+
+    @classmethod
+    def instance(cls, config_name="config.ini"):
+        """
+        Return the shared calendar, reloading it from StockCalendarInfo on the first call of a new day.
+        """
+        today = datetime.date.today()
+        calendar = cls._instance
+        if calendar is None or calendar.loaded_on != today:
+            with cls._instance_lock:
+                calendar = cls._instance
+                if calendar is None:
+                    calendar = cls(StockCalendarInfo.instance(config_name))
+                elif calendar.loaded_on != today:
+                    calendar = cls(StockCalendarInfo.refresh(config_name))
+                cls._instance = calendar
+        return calendar
+
+    def is_trading_day(self, dt=None) -> bool:
+        """
+        Whether dt (default today) is an open day.
+        """
+        return _date_key(dt if dt is not None else datetime.date.today()) in self._open_set
+
+    def next_trading_day(self, dt=None):
+        """
+        First open day strictly after dt (default today), or None past the end of the calendar.
+        """
+        key = _date_key(dt if dt is not None else datetime.date.today())
+        i = np.searchsorted(self.open_days, key, side="right")
+        return int(self.open_days[i]) if i < len(self.open_days) else None
+
+    def prev_trading_day(self, dt=None):
+        """
+        Last open day strictly before dt (default today), or None before the start of the calendar.
+        """
+        key = _date_key(dt if dt is not None else datetime.date.today())
+        i = np.searchsorted(self.open_days, key, side="left")
+        return int(self.open_days[i - 1]) if i > 0 else None
+
+    def trading_days_between(self, start, end) -> np.ndarray:
+        """
+        Open days d with start <= d <= end, as a sorted int array.
+        """
+        lo = np.searchsorted(self.open_days, _date_key(start), side="left")
+        hi = np.searchsorted(self.open_days, _date_key(end), side="right")
+        return self.open_days[lo:hi]
+
+
+class SymbolIndex(object):
+    """
+    Hash index over the StockBasicInfo fund+stock list, mapping symbol -> ts_code and ts_code -> symbol.
+
+    Both dicts keep the first occurrence, like the boolean-mask lookup they replace. refresh() builds new
+    dicts from a fresh StockBasicInfo load and publishes them with a single reference assignment, so
+    readers never block and always see one consistent pair of mappings.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, df_list):
+        self._maps = self._build(df_list)
+
+    @staticmethod
+    def _build(df_list):
+        to_ts_code, to_symbol = {}, {}
+        for symbol, ts_code in zip(df_list["symbol"].tolist(), df_list["ts_code"].tolist()):
+            to_ts_code.setdefault(symbol, ts_code)
+            to_symbol.setdefault(ts_code, symbol)
+        return to_ts_code, to_symbol
+
+    @classmethod
+    def instance(cls, config_name="config.ini"):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(StockBasicInfo.instance(config_name))
         return cls._instance
 
+    def refresh(self, config_name="config.ini"):
+        """
+        Reload the symbol list and swap in the new mappings.
+        """
+        self._maps = self._build(StockBasicInfo.refresh(config_name))
+
+    def to_ts_code(self, symbol):
+        return self._maps[0].get(symbol)
+
+    def to_symbol(self, ts_code):
+        return self._maps[1].get(ts_code)
+
+    @staticmethod
+    def _map_many(values, mapping):
+        mapped = pd.Series(values).map(mapping)
+        mapped = mapped.astype(object).where(mapped.notna(), None)
+        return mapped if isinstance(values, pd.Series) else mapped.to_numpy()
+
+    def to_ts_codes(self, symbols):
+        """
+        Convert many symbols at once.
+        Parameters:
+        symbols (array-like or pd.Series): The symbols to convert.
+        Returns:
+        np.ndarray or pd.Series: ts_codes (None where unknown); a Series with the same index for Series input.
+        """
+        return self._map_many(symbols, self._maps[0])
+
+    def to_symbols(self, ts_codes):
+        """
+        Convert many ts_codes at once, the inverse of to_ts_codes.
+        """
+        return self._map_many(ts_codes, self._maps[1])
 
-def check_ts_symbol(symbol, config_name="config.ini"):
-    df_stock_list = StockBasicInfo.instance(config_name)
-    m = df_stock_list[df_stock_list["symbol"] == symbol]
 
-    if m is None or len(m) == 0:
-        return None
-    else:
-        return m.iloc[0]["ts_code"]
+def check_ts_symbol(symbol, config_name="config.ini"):
+    return SymbolIndex.instance(config_name).to_ts_code(symbol)
 
 
 def is_in_trading_time() -> bool:
@@ -94,18 +269,15 @@ def is_after_sys_working_time() -> bool:
 def read_from_cache(dt) -> pd.DataFrame:
     filename = "trading_date.csv"
     if not exists(filename):
-        # df = pro.trade_cal(exchange="", start_date=dt, end_date=dt)
-        # df.to_csv(filename, index=False)
-        
-        return StockCalendarInfo.instance("config.ini").to_csv(filename, index=False)
-        # return df
-
-    df = pd.read_csv(filename)
-    if len(df[df["cal_date"] == dt]) == 0:
-        # df = pro.trade_cal(exchange="", start_date=dt, end_date=dt)
-        # df.to_csv(filename, index=False)
-        StockCalendarInfo.instance("config.ini").to_csv(filename, index=False)
+        df = StockCalendarInfo.instance("config.ini")
+        df.to_csv(filename, index=False)
+    else:
+        df = pd.read_csv(filename, dtype={"cal_date": str})
+        if len(df[df["cal_date"] == dt]) == 0:
+            df = StockCalendarInfo.instance("config.ini")
+            df.to_csv(filename, index=False)
 
+    df = df.copy()
     df['cal_date'] = df['cal_date'].astype(str)
     return df
 
@@ -113,118 +285,489 @@ def read_from_cache(dt) -> pd.DataFrame:
 def read_debt_list_from_cache(dt) -> pd.DataFrame:
     filename = "debt_date.csv"
     if not exists(filename):
-        df = pro.margin_target(mg_type="B")
+        df = get_pro_api().margin_target(mg_type="B")
         df["dt"] = dt
         df.to_csv(filename, index=False)
         return df
 
     df = pd.read_csv(filename, dtype={"dt": str})
     if len(df[df["dt"] == dt]) == 0:
-        df = pro.margin_target(mg_type="B")
+        df = get_pro_api().margin_target(mg_type="B")
         df["dt"] = dt
         df.to_csv(filename, index=False)
 
     return df
 
 
-def is_debt_buy(symbol) -> bool:
-    ct = datetime.datetime.now()
-    dt = ct.strftime("%Y%m%d")
+class MarginTargetSet(object):
+    """
+    In-memory set of the margin-eligible ts_codes (pro.margin_target, mg_type "B"), loaded once per day.
 
-    df = read_debt_list_from_cache(dt)
-    return len(df[df["ts_code"] == symbol]) > 0
+    The first lookup of a day loads the set, from the debt_date.csv snapshot when it was taken that day and
+    from tushare otherwise (refreshing the snapshot); later lookups are frozenset membership tests. Call
+    prefetch() before the open so the download never happens mid-session.
+    """
 
+    _instance = None
+    _instance_lock = threading.Lock()
 
-def is_in_trading_day() -> bool:
-    ct = datetime.datetime.now()
-    dt = ct.strftime("%Y%m%d")
+    def __init__(self, filename="debt_date.csv"):
+        self.filename = filename
+        self._state = (None, frozenset())
+        self._load_lock = threading.Lock()
 
-    df = read_from_cache(dt)
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
 
-    if df is None or len(df) == 0:
-        return False
+    def _fetch(self, dt):
+        if exists(self.filename):
+            df = pd.read_csv(self.filename, dtype={"dt": str, "ts_code": str})
+            if (df["dt"] == dt).any():
+                return frozenset(df["ts_code"])
 
-    print(df)
-    print(dt)
-    print(df[df["cal_date"] == dt])
-    return df[df["cal_date"] == dt].iloc[0]["is_open"] > 0
+        df = get_pro_api().margin_target(mg_type="B")
+        df["dt"] = dt
+        df.to_csv(self.filename, index=False)
+        return frozenset(df["ts_code"])
+
+    def get(self, dt=None) -> frozenset:
+        """
+        Return the ts_codes for dt (default today), loading them if the held set is from another day.
+        """
+        dt = dt or datetime.datetime.now().strftime("%Y%m%d")
+        state = self._state
+        if state[0] != dt:
+            with self._load_lock:
+                state = self._state
+                if state[0] != dt:
+                    state = (dt, self._fetch(dt))
+                    self._state = state
+        return state[1]
+
+    def prefetch(self, dt=None, background=False):
+        """
+        Load the set for dt (default today) ahead of use.
+        Parameters:
+        dt (str, optional): YYYYMMDD date. Default is today.
+        background (bool, optional): Load in a daemon thread and return it instead of blocking. Default is False.
+        Returns:
+        threading.Thread or None: The loading thread when background is True.
+        """
+        if not background:
+            self.get(dt)
+            return None
+        thread = threading.Thread(target=self.get, args=(dt,), daemon=True)
+        thread.start()
+        return thread
+
+    def __contains__(self, ts_code) -> bool:
+        return ts_code in self.get()
 
 
-def get_1m_raw_pressure_and_support(df, gap=0.005):
-    p2 = df.groupby("close").agg({"volume": "sum"}).reset_index()
-    p2["datetime"] = p2["volume"]
-    p2["last"] = p2["close"]
+def is_debt_buy(symbol) -> bool:
+    return symbol in MarginTargetSet.instance()
+
 
+def is_in_trading_day() -> bool:
+    return TradingCalendar.instance("config.ini").is_trading_day(datetime.date.today())
+
+
+def _cluster_price_levels(prices, volumes, gap=0.005):
+    """
+    Greedy volume clustering behind get_1m_raw_pressure_and_support.
+
+    Levels are visited in the given order (descending volume); each joins the earliest created cluster
+    whose anchor price d satisfies d * (1 - gap) <= price <= d * (1 + gap), or starts a new cluster
+    anchored at its own price. Anchors never move, so they are kept in a sorted list and only the few
+    anchors inside the widened band around each price are checked with the exact condition.
+    Parameters:
+    prices (iterable): Level prices, in visiting order.
+    volumes (iterable): Volume of each level.
+    gap (float, optional): Relative band half-width. Default is 0.005.
+    Returns:
+    list: One {"price": anchor, "datetime": summed volume} dict per cluster, in creation order.
+    """
     data = []
-    for index, row in p2.sort_values("datetime", ascending=False).iterrows():
-        price = row["last"]
-        count = abs(row["datetime"])
-
-        is_not_in_price_list = True
-        for index in range(0, len(data)):
-            d = data[index]
-            if price <= d["price"] * (1 + gap) and price >= d["price"] * (1 - gap):
-                is_not_in_price_list = False
-                data[index]["datetime"] = data[index]["datetime"] + count
-                break
-
-        if is_not_in_price_list:
+    anchors = []  # sorted (anchor price, cluster position)
+    banded = 0 <= gap < 1
+    for price, count in zip(prices, volumes):
+        if banded and price > 0:
+            lo = bisect.bisect_left(anchors, (price / (1 + gap) * (1 - 1e-12), -1))
+            hi = bisect.bisect_right(anchors, (price / (1 - gap) * (1 + 1e-12), len(data)))
+            candidates = anchors[lo:hi]
+        else:
+            candidates = [(d["price"], i) for i, d in enumerate(data)]
+
+        position = None
+        for anchor, i in candidates:
+            if price <= anchor * (1 + gap) and price >= anchor * (1 - gap) and (position is None or i < position):
+                position = i
+
+        if position is None:
+            bisect.insort(anchors, (price, len(data)))
             data.append({"price": price, "datetime": count})
+        else:
+            data[position]["datetime"] = data[position]["datetime"] + count
 
     return data
 
 
-def compute_volatility(contract):
-    # 包含多少天的标的合约价格
-    days = len(contract)
-
-    # 获取每日收盘价（或者结算价）并存入数组
-    prices = contract["close"].values.tolist()
+def _sorted_levels(p2):
+    # same sort call as the original implementation, so equal volumes keep their relative order
+    p2 = p2.sort_values("volume", ascending=False)
+    return p2["close"].to_numpy(dtype=np.float64).tolist(), np.abs(p2["volume"].to_numpy(dtype=np.float64)).tolist()
 
-    # 对价格取自然对数
-    ln_prices = [np.log(x) for x in prices]
-
-    # 以下表示取对数价格的差，并存在diffPriceArray数组中，   //我们忽略了边界条件，实际  得到数组长度为nDays-1
-    diff_prices = []
-    for i in range(days):
-        diff_prices.append(ln_prices[i] - ln_prices[i - 1])
-
-    # 计算波动率
-    sigma = np.std(diff_prices) * math.sqrt(250 / days)
-    return sigma
 
+def get_1m_raw_pressure_and_support(df, gap=0.005):
+    p2 = df.groupby("close").agg({"volume": "sum"}).reset_index()
+    return _cluster_price_levels(*_sorted_levels(p2), gap)
+
+
+def get_1m_raw_pressure_and_support_batch(frames, gap=0.005, symbol_column="symbol"):
+    """
+    get_1m_raw_pressure_and_support for many symbols at once.
+    Parameters:
+    frames (dict or pd.DataFrame): symbol -> 1m frame, or one long frame with a symbol column.
+    gap (float, optional): Relative band half-width. Default is 0.005.
+    symbol_column (str, optional): Symbol column of a long frame. Default is "symbol".
+    Returns:
+    dict: symbol -> list of {"price", "datetime"} clusters, as get_1m_raw_pressure_and_support returns.
+    """
+    if isinstance(frames, dict):
+        return {symbol: get_1m_raw_pressure_and_support(df, gap) for symbol, df in frames.items()}
+
+    # a single groupby over (symbol, close) instead of one per symbol
+    levels = frames.groupby([symbol_column, "close"]).agg({"volume": "sum"})
+    result = {}
+    for symbol, p2 in levels.groupby(level=0, sort=False):
+        result[symbol] = _cluster_price_levels(*_sorted_levels(p2.droplevel(0).reset_index()), gap)
+    return result
+
+
+class VolumeAtPrice(object):
+    """
+    Incremental volume-at-price histogram for live pressure/support levels.
+
+    Volumes are accumulated in a float64 array indexed by price tick (offset by the lowest tick seen), so
+    ingesting a bar or tick is an array update and levels() only walks the occupied price range instead of
+    the day's bars. levels(gap) returns the clusters get_1m_raw_pressure_and_support would return for the
+    same bars, as long as prices lie on the tick grid.
+    Methods:
+        add(price, volume):
+        add_bars(df):
+        levels(gap=0.005) -> list:
+        reset():
+    """
+
+    def __init__(self, tick=0.01, capacity=1024):
+        """
+        Parameters:
+        tick (float, optional): Price increment of the instrument. Default is 0.01.
+        capacity (int, optional): Initial number of price ticks the array holds; it grows as needed. Default is 1024.
+        """
+        self.tick = tick
+        self.decimals = max(0, -int(math.floor(math.log10(tick))))
+        self._capacity = capacity
+        self.reset()
+
+    def reset(self):
+        self._base = None
+        self._volumes = np.zeros(self._capacity, dtype=np.float64)
+        self._seen = np.zeros(self._capacity, dtype=bool)
+
+    def _reserve(self, lo, hi):
+        # make the absolute tick indices lo..hi addressable, growing the arrays geometrically
+        size = len(self._volumes)
+        if self._base is None:
+            self._base = lo - max(size - (hi - lo + 1), 0) // 2
+        start, stop = self._base, self._base + size
+        if lo >= start and hi < stop:
+            return
+
+        new_size = max(max(stop, hi + 1) - min(start, lo), 2 * size)
+        new_start = max(stop, hi + 1) - new_size if lo < start else start
+        offset = start - new_start
+        volumes = np.zeros(new_size, dtype=np.float64)
+        seen = np.zeros(new_size, dtype=bool)
+        volumes[offset:offset + size] = self._volumes
+        seen[offset:offset + size] = self._seen
+        self._base, self._volumes, self._seen = new_start, volumes, seen
+
+    def add(self, price, volume):
+        """
+        Add the volume traded at price; for tick snapshots pass the change of the cumulative volume.
+        """
+        i = int(round(price / self.tick))
+        self._reserve(i, i)
+        self._volumes[i - self._base] += volume
+        self._seen[i - self._base] = True
+
+    def add_bars(self, df):
+        """
+        Add 1m bars, counting each bar's volume at its close as get_1m_raw_pressure_and_support does.
+        Parameters:
+        df (pd.DataFrame): Bars with close and volume columns.
+        """
+        close = df["close"].to_numpy(dtype=np.float64)
+        volume = df["volume"].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(close)
+        if not valid.any():
+            return
+        idx = np.rint(close[valid] / self.tick).astype(np.int64)
+        self._reserve(int(idx.min()), int(idx.max()))
+        np.add.at(self._volumes, idx - self._base, volume[valid])
+        self._seen[idx - self._base] = True
+
+    def levels(self, gap=0.005):
+        """
+        Current volume clusters.
+        Parameters:
+        gap (float, optional): Relative band half-width, as in get_1m_raw_pressure_and_support. Default is 0.005.
+        Returns:
+        list: One {"price": anchor, "datetime": summed volume} dict per cluster.
+        """
+        if self._base is None:
+            return []
+        occupied = np.flatnonzero(self._seen)
+        p2 = pd.DataFrame(
+            {
+                "close": np.round((occupied + self._base) * self.tick, self.decimals),
+                "volume": self._volumes[occupied],
+            }
+        )
+        return _cluster_price_levels(*_sorted_levels(p2), gap)
 
-def get_code_volatility(ts_code, end_date, length):
-    start_date = "20210101"
 
+def compute_volatility(contract):
+    """
+    Annualized volatility of daily closes: std (ddof 0) of the log price differences times sqrt(250 / days).
+
+    As in the original loop the first difference wraps around (ln p[0] - ln p[-1]), so there are as many
+    differences as days.
+    Parameters:
+    contract (pd.DataFrame or np.ndarray): Frame with a close column, or closes as a (days,) array or a
+        (days x codes) array for many series at once.
+    Returns:
+    float or np.ndarray: The volatility, one per column for 2-D input.
+    """
+    prices = contract["close"].to_numpy(dtype=np.float64) if isinstance(contract, pd.DataFrame) else contract
+    prices = np.asarray(prices, dtype=np.float64)
+    days = len(prices)
+
+    ln_prices = np.log(prices)
+    diff_prices = ln_prices - np.roll(ln_prices, 1, axis=0)
+    return np.std(diff_prices, axis=0) * math.sqrt(250 / days)
+
+
+def _fetch_daily(ts_code, start_date, end_date) -> pd.DataFrame:
     if ("1" in ts_code and ts_code.index("1") == 0) or (
         "5" in ts_code and ts_code.index("5") == 0
     ):
-        df = pro.fund_daily(
+        df = get_pro_api().fund_daily(
             ts_code=ts_code, adj="qfq", start_date=start_date, end_date=end_date
         )
     else:
+        import tushare as ts
+
+        get_pro_api()
         df = ts.pro_bar(
             ts_code=ts_code, adj="qfq", start_date=start_date, end_date=end_date
         )
-    df = df.sort_values("trade_date", ascending=True).reset_index()
-
-    days_dates = df[df["trade_date"] > "20210201"]["trade_date"].values
-    targets = days_dates[-length:]
+    if df is None:
+        return pd.DataFrame(columns=["trade_date", "close"])
+    return df.sort_values("trade_date", ascending=True).reset_index(drop=True)
+
+
+class DailyBarStore(object):
+    """
+    Local columnar store of qfq daily bars, one .npz file per ts_code, appended incrementally.
+
+    update() only downloads the bars after the last stored date, overlapping it by one day: if the qfq
+    close of that day changed (a dividend or split re-adjusted the history) the whole history is
+    downloaded again instead of appended. Loaded bars are also kept in memory, so reads after the first
+    touch neither the disk nor tushare. While end_date is today or later (today's bar may not be
+    published yet) tushare is asked again at most once per recheck_interval seconds per ts_code.
+    Use get_daily_bar_store() for the shared instance the module level functions use.
+    Methods:
+        update(ts_code, end_date):
+        get(ts_code, end_date=None) -> dict:
+        frame(ts_code, end_date=None) -> pd.DataFrame:
+    """
+
+    def __init__(self, root=DAILY_BAR_ROOT, start_date="20210101", recheck_interval=600):
+        self.root = root
+        self.start_date = start_date
+        self.recheck_interval = recheck_interval
+        self._bars = {}
+        self._checked = {}
+        self._lock = threading.Lock()
+
+    def _path(self, ts_code):
+        return os.path.join(self.root, f"{ts_code}.npz")
+
+    def _load(self, ts_code):
+        bars = self._bars.get(ts_code)
+        if bars is None and exists(self._path(ts_code)):
+            with np.load(self._path(ts_code)) as npz:
+                bars = {name: npz[name] for name in npz.files}
+            self._bars[ts_code] = bars
+        return bars
+
+    def _save(self, ts_code, bars):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self._path(ts_code) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **bars)
+        os.replace(tmp_path, self._path(ts_code))
+        self._bars[ts_code] = bars
+
+    @staticmethod
+    def _columns(df, names=None):
+        names = names or ["close"] + [
+            c for c in df.columns
+            if c not in ("ts_code", "trade_date", "close") and pd.api.types.is_numeric_dtype(df[c])
+        ]
+        bars = {"trade_date": df["trade_date"].astype(str).str.replace("-", "").str[:8].astype(np.int64).to_numpy()}
+        for name in names:
+            bars[name] = df[name].to_numpy(dtype=np.float64) if name in df.columns else np.full(len(df), np.nan)
+        return bars
+
+    def update(self, ts_code, end_date):
+        """
+        Bring the stored bars of ts_code up to end_date (YYYYMMDD).
+        """
+        end = _date_key(end_date)
+        today = _date_key(datetime.date.today())
+        with self._lock:
+            bars = self._load(ts_code)
+            if bars is not None and int(bars["fetched_to"][0]) >= end:
+                return
+            checked = self._checked.get(ts_code)
+            if bars is not None and checked is not None and checked[0] >= end and (
+                time.monotonic() - checked[1] < self.recheck_interval
+            ):
+                return
+
+            appended = None
+            if bars is not None and len(bars["trade_date"]) > 0:
+                last = int(bars["trade_date"][-1])
+                df = _fetch_daily(ts_code, str(last), str(end))
+                names = [n for n in bars if n not in ("trade_date", "fetched_to")]
+                new = self._columns(df, names)
+                overlap = new["trade_date"] == last
+                if overlap.any() and np.allclose(new["close"][overlap][:1], bars["close"][-1:], rtol=1e-8, atol=0):
+                    keep = new["trade_date"] > last
+                    appended = {n: np.concatenate([bars[n], new[n][keep]]) for n in ["trade_date"] + names}
+
+            if appended is None:
+                appended = self._columns(_fetch_daily(ts_code, self.start_date, str(end)))
+
+            # until today's bar has been published, later calls for today have to look again
+            last_stored = int(appended["trade_date"][-1]) if len(appended["trade_date"]) else 0
+            fetched_to = end if end < today else min(end, last_stored)
+            appended["fetched_to"] = np.array([fetched_to], dtype=np.int64)
+            self._save(ts_code, appended)
+            self._checked[ts_code] = (end, time.monotonic())
+
+    def get(self, ts_code, end_date=None, update=True) -> dict:
+        """
+        Stored bars of ts_code up to end_date as a dict of column arrays (trade_date as YYYYMMDD ints).
+        Parameters:
+        ts_code (str): The tushare code.
+        end_date (str, optional): Last date to include, YYYYMMDD. Default is all stored bars.
+        update (bool, optional): Download missing bars up to end_date first. Default is True.
+        """
+        if update and end_date is not None:
+            self.update(ts_code, end_date)
+        bars = self._load(ts_code)
+        if bars is None:
+            return {"trade_date": np.empty(0, dtype=np.int64), "close": np.empty(0)}
+        columns = {n: v for n, v in bars.items() if n != "fetched_to"}
+        if end_date is None:
+            return columns
+        stop = np.searchsorted(columns["trade_date"], _date_key(end_date), side="right")
+        return {n: v[:stop] for n, v in columns.items()}
+
+    def frame(self, ts_code, end_date=None, update=True) -> pd.DataFrame:
+        df = pd.DataFrame(self.get(ts_code, end_date, update))
+        df["trade_date"] = df["trade_date"].astype(str)
+        return df
 
-    index = df[df["trade_date"].isin(targets)].iloc[0].name
-    start_index = df.iloc[index - 10].name
-    end_index = df.iloc[index - 1].name
 
-    if end_index < start_index:
+def get_daily_bar_store(root=None):
+    """
+    Return the shared DailyBarStore, creating it on first use.
+    Parameters:
+    root (str, optional): Directory of the store; when it differs from the current one the shared store is
+        replaced. Default is DAILY_BAR_ROOT (~/.breadt/daily_bars, or $BREADT_DAILY_BAR_ROOT).
+    """
+    global _daily_bar_store
+    if _daily_bar_store is None or (root is not None and root != _daily_bar_store.root):
+        _daily_bar_store = DailyBarStore(root or DAILY_BAR_ROOT)
+    return _daily_bar_store
+
+
+def _window_positions(n, m, length):
+    """
+    First row of the 9-close window get_code_volatility has always used, per series.
+
+    The first target is row k = n - min(length, m) (all m rows when length is 0) and the window is rows
+    k - 10 .. k - 2, taken modulo n like the negative iloc indices it replaces; -1 where the original
+    returned None or failed (no target dates, 1 <= k < 10, or fewer than 10 rows).
+    """
+    n = np.asarray(n, dtype=np.int64)
+    m = np.asarray(m, dtype=np.int64)
+    k = n - (np.minimum(length, m) if length > 0 else m)
+    valid = (m > 0) & (n >= 10) & ((k == 0) | (k >= 10))
+    return np.where(valid, (k - 10) % np.maximum(n, 1), -1)
+
+
+def get_code_volatility(ts_code, end_date, length, store=None):
+    store = store or get_daily_bar_store()
+    bars = store.get(ts_code, end_date)
+    dates, closes = bars["trade_date"], bars["close"]
+
+    start = int(_window_positions(len(dates), np.count_nonzero(dates > 20210201), length))
+    if start < 0:
         return None
 
-    tmp = df[start_index:end_index].copy()
-
-    if tmp is None:
-        return None
+    value = round(compute_volatility(closes[start:start + 9]) * 0.1, 4)
+    return value
 
-    prices = tmp.reset_index()
 
-    value = round(compute_volatility(prices) * 0.1, 4)
-    return value
+def get_universe_volatility(ts_codes, end_date, length, store=None, update=True) -> pd.Series:
+    """
+    get_code_volatility for many ts_codes, computed in one vectorized pass over the stored bars.
+    Parameters:
+    ts_codes (list): The tushare codes.
+    end_date (str): Last date to include, YYYYMMDD.
+    length (int): Number of trailing days, as in get_code_volatility.
+    store (DailyBarStore, optional): The bar store. Default is get_daily_bar_store().
+    update (bool, optional): Download missing bars up to end_date first. Default is True.
+    Returns:
+    pd.Series: Volatility per ts_code, NaN where get_code_volatility returns None.
+    """
+    store = store or get_daily_bar_store()
+    ts_codes = list(ts_codes)
+    bars = [store.get(ts_code, end_date, update) for ts_code in ts_codes]
+
+    n = np.array([len(b["trade_date"]) for b in bars], dtype=np.int64)
+    m = np.array([np.count_nonzero(b["trade_date"] > 20210201) for b in bars], dtype=np.int64)
+    start = _window_positions(n, m, length)
+
+    # (max rows x codes) close panel, NaN padded, then gather each code's 9-row window at once
+    panel = np.full((max(int(n.max(initial=0)), 9), len(ts_codes)), np.nan)
+    for j, b in enumerate(bars):
+        panel[: n[j], j] = b["close"]
+    valid = start >= 0
+    rows = np.where(valid, start, 0)[None, :] + np.arange(9)[:, None]
+    window = panel[rows, np.arange(len(ts_codes))[None, :]]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        values = np.round(compute_volatility(window) * 0.1, 4)
+    return pd.Series(np.where(valid, values, np.nan), index=ts_codes, dtype=np.float64)
@@ -0,0 +1,250 @@
+import functools
+import hashlib
+import inspect
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# static methods that write new columns into one of their DataFrame arguments
+MUTATING_ARGUMENTS = {
+    "AlgorithmBaseETL.cal_volatility": "df",
+    "AlgoKalmanFilterProcessor.process_kf_df": "df",
+}
+
+
+def _feed(h, value):
+    if value is None or isinstance(value, (bool, int, float, str, bytes, np.generic)):
+        h.update(f"{type(value).__name__}:{value!r};".encode())
+    elif isinstance(value, np.dtype) or (isinstance(value, type) and issubclass(value, np.generic)):
+        # np.float64 and np.dtype("float64") select the same output, so they share a key
+        h.update(f"dtype:{np.dtype(value).str};".encode())
+    elif isinstance(value, type):
+        h.update(f"type:{value.__module__}.{value.__qualname__};".encode())
+    elif isinstance(value, np.ndarray):
+        h.update(f"ndarray:{value.dtype.str}:{value.shape};".encode())
+        if value.dtype == object:
+            h.update(pd.util.hash_pandas_object(pd.Series(value.ravel()), index=False).to_numpy().tobytes())
+        else:
+            h.update(np.ascontiguousarray(value).view(np.uint8))
+    elif isinstance(value, pd.RangeIndex):
+        h.update(f"range:{value.start}:{value.stop}:{value.step};".encode())
+    elif isinstance(value, pd.Index):
+        h.update(b"index;")
+        _feed(h, value.to_numpy())
+    elif isinstance(value, pd.Series):
+        h.update(b"series;")
+        _feed(h, value.name)
+        _feed(h, value.index)
+        _feed(h, value.to_numpy())
+    elif isinstance(value, pd.DataFrame):
+        h.update(b"frame;")
+        _feed(h, value.columns)
+        _feed(h, value.index)
+        for i in range(value.shape[1]):
+            _feed(h, value.iloc[:, i].to_numpy())
+    elif isinstance(value, (list, tuple)):
+        array = None
+        if len(value) > 0 and isinstance(value[0], (int, float, np.number)):
+            try:
+                array = np.asarray(value)
+            except ValueError:
+                array = None
+        if array is not None and array.dtype.kind in "biuf":
+            h.update(f"{type(value).__name__};".encode())
+            _feed(h, array)
+        else:
+            h.update(f"{type(value).__name__}:{len(value)};".encode())
+            for item in value:
+                _feed(h, item)
+    elif isinstance(value, dict):
+        h.update(f"dict:{len(value)};".encode())
+        for k in sorted(value, key=repr):
+            _feed(h, k)
+            _feed(h, value[k])
+    else:
+        raise TypeError(f"cannot fingerprint argument of type {type(value).__name__}")
+
+
+def fingerprint(*values) -> str:
+    """
+    Content hash of arrays, pandas objects and plain parameters.
+
+    Array buffers are hashed directly, so two calls with equal data (not necessarily the same objects)
+    share a fingerprint. Raises TypeError for values it does not know how to hash.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for value in values:
+        _feed(h, value)
+    return h.hexdigest()
+
+
+def _nbytes(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        return int(np.sum(value.memory_usage(deep=True)))
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_nbytes(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+def _copy(value):
+    if isinstance(value, (np.ndarray, pd.Series, pd.DataFrame)):
+        return value.copy()
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    if isinstance(value, tuple):
+        return tuple(_copy(v) for v in value)
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    return value
+
+
+class IndicatorCache:
+    """
+    Opt-in LRU memoization for the static indicator methods of AlgorithmBaseETL and AlgoKalmanFilterProcessor.
+
+    Results are keyed by a content hash of the input buffers plus the call parameters and bounded by both
+    entry count and bytes. Cached values are copied on the way out so callers cannot corrupt the cache.
+    Calls with an argument that cannot be fingerprinted run uncached and are counted in stats()["bypasses"].
+    Functions that mutate a DataFrame argument (see MUTATING_ARGUMENTS) are computed on a copy and the
+    columns they add are written back into the caller's frame on every call, hit or miss.
+
+    Usage:
+        cache = IndicatorCache(max_entries=256, max_bytes=256 * 1024 * 1024)
+        get_adx = cache.wrap(AlgorithmBaseETL.get_adx_trend_idx)
+        cache.install(AlgorithmBaseETL, "get_adx_resolution")  # also used by the internal callers
+    """
+
+    def __init__(self, max_entries=256, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bypasses = 0
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._installed = []
+
+    def wrap(self, func, mutates=None):
+        """
+        Return a memoized version of func.
+        Parameters:
+        func (callable): The function to memoize, e.g. AlgorithmBaseETL.get_adx_resolution.
+        mutates (str, optional): Name of a DataFrame argument the function modifies in place. Looked up
+            in MUTATING_ARGUMENTS by qualified name when not given.
+        Returns:
+        callable: The memoized function.
+        """
+        name = func.__qualname__
+        if mutates is None:
+            mutates = MUTATING_ARGUMENTS.get(name)
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            try:
+                key = fingerprint(name, *bound.arguments.items())
+            except TypeError:
+                with self._lock:
+                    self.bypasses += 1
+                return func(*args, **kwargs)
+
+            target = bound.arguments[mutates] if mutates else None
+            entry = self._get(key)
+            if entry is None:
+                if mutates:
+                    bound.arguments[mutates] = target.copy()
+                result = func(*bound.args, **bound.kwargs)
+                changed = None
+                if mutates:
+                    changed = [
+                        c for c in result.columns if c not in target.columns or not result[c].equals(target[c])
+                    ]
+                entry = (result, changed)
+                self._put(key, entry)
+
+            result, changed = entry
+            if mutates:
+                for column in changed:
+                    target[column] = result[column].to_numpy(copy=True)
+                return target
+            return _copy(result)
+
+        wrapper.cache = self
+        return wrapper
+
+    def install(self, cls, *names):
+        """
+        Replace static methods of cls with memoized versions, until uninstall() is called.
+        Parameters:
+        cls (type): e.g. AlgorithmBaseETL.
+        names (str): Names of the static methods to memoize.
+        """
+        with self._lock:
+            for name in names:
+                original = inspect.getattr_static(cls, name)
+                setattr(cls, name, staticmethod(self.wrap(original.__func__)))
+                self._installed.append((cls, name, original))
+
+    def uninstall(self):
+        """
+        Restore every static method replaced by install().
+        """
+        with self._lock:
+            while self._installed:
+                cls, name, original = self._installed.pop()
+                setattr(cls, name, original)
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _put(self, key, entry):
+        size = _nbytes(entry[0])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (entry, size)
+            self.current_bytes += size
+            while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """
+        Returns:
+        dict: hits, misses, evictions, bypasses (uncacheable calls), entries and bytes currently held.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "bypasses": self.bypasses,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+            }
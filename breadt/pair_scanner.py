@@ -0,0 +1,176 @@
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from .algo_kalman_filter import AlgoKalmanFilterProcessor
+
+# per worker process view of the shared price panel, set by _attach_prices
+_shared_prices = None
+_shared_block = None
+
+
+def _attach_prices(name, shape, dtype):
+    global _shared_prices, _shared_block
+    _shared_block = shared_memory.SharedMemory(name=name)
+    _shared_prices = np.ndarray(shape, dtype=dtype, buffer=_shared_block.buf)
+
+
+def _last_zscore(spread, window):
+    """
+    Z-score of the last bar over the trailing window, as process_kf_df computes kf_zscore_origin.
+    """
+    if window < 2 or window > len(spread):
+        return np.nan
+    tail = spread[-window:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (tail[-1] - tail.mean()) / tail.std(ddof=1)
+
+
+def _scan_chunk(pair_index, observation_covariance):
+    prices = _shared_prices
+    spreads = AlgoKalmanFilterProcessor.get_kalman_filter_spread_batch(
+        prices[:, pair_index[:, 0]], prices[:, pair_index[:, 1]], observation_covariance
+    )
+    half_life = AlgoKalmanFilterProcessor.cal_half_life_batch(spreads, mean_reverting_only=True)
+    # process_kf_df is fed the half-life as seed, giving a z-score window of int(seed * 2)
+    zscore = np.array(
+        [
+            _last_zscore(spreads[:, j], int(h * 2)) if np.isfinite(h) else np.nan
+            for j, h in enumerate(half_life)
+        ]
+    )
+    spread_std = spreads.std(axis=0, ddof=1) if len(spreads) > 1 else np.full(len(pair_index), np.nan)
+    return pair_index, half_life, zscore, spread_std
+
+
+class PairUniverseScanner:
+    """
+    Scan a universe of symbols for mean-reverting pairs with AlgoKalmanFilterProcessor.
+
+    The (time x symbol) price panel is copied once into shared memory; worker processes attach to it and
+    receive only chunks of pair indices, so price data is never pickled per task. Each chunk runs the
+    batched Kalman spread, half-life and last-bar z-score for its pairs. Chunks are submitted with a
+    bounded number in flight, so cancel() stops the scan promptly and returns what has been computed.
+    Methods:
+        scan(pairs=None, progress=None) -> pd.DataFrame:
+        cancel():
+    """
+
+    def __init__(self, prices, observation_covariance=0.5, max_workers=None, chunk_size=256):
+        """
+        Parameters:
+        prices (pd.DataFrame): (time x symbol) prices. Symbols with missing values are skipped, so forward
+            fill or trim the panel first if partially listed symbols should be included.
+        observation_covariance (float, optional): The Kalman observation covariance. Default is 0.5.
+        max_workers (int, optional): Number of worker processes. Default is os.cpu_count().
+        chunk_size (int, optional): Number of pairs per task. Default is 256.
+        """
+        complete = prices.columns[prices.notna().all(axis=0).to_numpy()]
+        self.symbols = list(complete)
+        self.prices = np.ascontiguousarray(prices[complete].to_numpy(dtype=np.float64))
+        self.observation_covariance = observation_covariance
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.done = 0
+        self.total = 0
+        self.elapsed = 0.0
+        self.cancelled = False
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """
+        Request the running scan to stop; pending chunks are dropped and scan() returns the partial ranking.
+        """
+        self._cancel_event.set()
+
+    def _pair_index(self, pairs):
+        if pairs is None:
+            return np.array(list(itertools.combinations(range(len(self.symbols)), 2)), dtype=np.int64).reshape(-1, 2)
+        position = {s: i for i, s in enumerate(self.symbols)}
+        return np.array(
+            [(position[a], position[b]) for a, b in pairs if a in position and b in position], dtype=np.int64
+        ).reshape(-1, 2)
+
+    def scan(self, pairs=None, progress=None):
+        """
+        Compute spread statistics for every candidate pair and rank them.
+        Parameters:
+        pairs (list of tuple, optional): (plus, minus) symbol pairs; all unordered combinations when None.
+        progress (callable, optional): Called as progress(done, total, pairs_per_second) after each chunk.
+        Returns:
+        pd.DataFrame: Columns plus, minus, half_life, zscore and spread_std, sorted by ascending half-life and then
+        descending |zscore|; pairs that do not mean-revert have a NaN half-life and come last. Only completed
+        chunks are included when the scan was cancelled.
+        """
+        self._cancel_event.clear()
+        self.cancelled = False
+        pair_index = self._pair_index(pairs)
+        self.total = len(pair_index)
+        self.done = 0
+        start = time.time()
+
+        results = []
+        chunks = (pair_index[i:i + self.chunk_size] for i in range(0, len(pair_index), self.chunk_size))
+
+        block = shared_memory.SharedMemory(create=True, size=max(self.prices.nbytes, 1))
+        try:
+            np.ndarray(self.prices.shape, dtype=self.prices.dtype, buffer=block.buf)[:] = self.prices
+            with ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_attach_prices,
+                initargs=(block.name, self.prices.shape, self.prices.dtype.str),
+            ) as pool:
+                in_flight = set()
+                for chunk in itertools.islice(chunks, self.max_workers * 2):
+                    in_flight.add(pool.submit(_scan_chunk, chunk, self.observation_covariance))
+
+                while in_flight:
+                    finished, in_flight = wait(in_flight, timeout=0.5, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        result = future.result()
+                        results.append(result)
+                        self.done += len(result[0])
+                        self.elapsed = time.time() - start
+                        if progress is not None:
+                            progress(self.done, self.total, self.done / self.elapsed if self.elapsed > 0 else 0.0)
+
+                    if self._cancel_event.is_set():
+                        self.cancelled = True
+                        for future in in_flight:
+                            future.cancel()
+                        break
+
+                    for chunk in itertools.islice(chunks, len(finished)):
+                        in_flight.add(pool.submit(_scan_chunk, chunk, self.observation_covariance))
+        finally:
+            block.close()
+            block.unlink()
+
+        self.elapsed = time.time() - start
+        return self._rank(results)
+
+    def _rank(self, results):
+        columns = ["plus", "minus", "half_life", "zscore", "spread_std"]
+        if not results:
+            return pd.DataFrame(columns=columns)
+
+        pair_index = np.concatenate([r[0] for r in results])
+        symbols = np.array(self.symbols, dtype=object)
+        ranking = pd.DataFrame(
+            {
+                "plus": symbols[pair_index[:, 0]],
+                "minus": symbols[pair_index[:, 1]],
+                "half_life": np.concatenate([r[1] for r in results]),
+                "zscore": np.concatenate([r[2] for r in results]),
+                "spread_std": np.concatenate([r[3] for r in results]),
+            }
+        )
+        ranking["abs_zscore"] = ranking["zscore"].abs()
+        ranking = ranking.sort_values(["half_life", "abs_zscore"], ascending=[True, False], na_position="last")
+        return ranking[columns].reset_index(drop=True)
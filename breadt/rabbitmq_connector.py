@@ -1,5 +1,4 @@
 import configparser
-import pika
 
 
 class RabbitMQConnector:
@@ -9,6 +8,9 @@ class RabbitMQConnector:
         self.connection = None
 
     def _connect(self, heartbeat=60):
+        # imported here so that trading_system_basic (and the QMT traders) do not pay for pika at import time
+        import pika
+
         credentials = pika.PlainCredentials(
             self.config["mq"]["user"], self.config["mq"]["password"]
         )
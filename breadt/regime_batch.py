@@ -0,0 +1,123 @@
+import multiprocessing
+import os
+import time
+import warnings
+from collections import deque
+from multiprocessing.connection import wait
+
+import pandas as pd
+
+from .algo_markov_regression import AlgoMarkovRegressionProcessor
+
+
+def _fit_symbol(conn, pval, stime, regime, rolling_window, freq, maxiter):
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            regimes, mr_model, smoothed_mr_model = AlgoMarkovRegressionProcessor.get_pval_rolling_window(
+                pval,
+                stime,
+                regime=regime,
+                rolling_window=rolling_window,
+                freq=freq,
+                maxiter=maxiter,
+                cov_type="none",
+                return_models=True,
+            )
+        if mr_model.mle_retvals["converged"] and smoothed_mr_model.mle_retvals["converged"]:
+            conn.send(("ok", regimes))
+        else:
+            conn.send(("failed", "not converged"))
+    except Exception as exc:
+        conn.send(("failed", f"error: {exc!r}"))
+    finally:
+        conn.close()
+
+
+class RegimeBatchRunner:
+    """
+    Run AlgoMarkovRegressionProcessor.get_pval_rolling_window for many symbols in parallel.
+
+    Every fit runs in its own worker process, at most max_workers at a time, so a fit that exceeds its
+    timeout can be terminated without stalling the rest of the batch. Fits that time out, fail to
+    converge within maxiter or raise are reported in `failures` instead of the results.
+    Methods:
+        run(series) -> pd.DataFrame:
+    """
+
+    def __init__(self, regime=2, rolling_window=36, freq="2h", maxiter=100, timeout=60, max_workers=None):
+        """
+        Parameters:
+        regime (int, optional): Number of regimes for the Markov switching model. Default is 2.
+        rolling_window (int, optional): Window size for the rolling mean smoothing. Default is 36.
+        freq (str, optional): The frequency of the time series data. Default is "2h".
+        maxiter (int, optional): Iteration cap for each of the two fits per symbol. Default is 100.
+        timeout (float, optional): Seconds allowed per symbol before its worker is terminated. Default is 60.
+        max_workers (int, optional): Number of concurrent fits. Default is os.cpu_count().
+        """
+        self.regime = regime
+        self.rolling_window = rolling_window
+        self.freq = freq
+        self.maxiter = maxiter
+        self.timeout = timeout
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.failures = {}
+
+    def run(self, series):
+        """
+        Fit the smoothed regimes of every symbol.
+        Parameters:
+        series (dict): symbol -> pd.Series of p-values indexed by time, or symbol -> (pval, stime).
+        Returns:
+        pd.DataFrame: A 'regime' column indexed by (symbol, time) for the symbols that converged. The
+        failures of this run are available in self.failures as symbol -> reason.
+        """
+        pending = deque(series.items())
+        running = {}
+        results = {}
+        self.failures = {}
+        context = multiprocessing.get_context()
+
+        while pending or running:
+            while pending and len(running) < self.max_workers:
+                symbol, data = pending.popleft()
+                pval, stime = (data.values, data.index) if isinstance(data, pd.Series) else data
+                receiver, sender = context.Pipe(duplex=False)
+                process = context.Process(
+                    target=_fit_symbol,
+                    args=(sender, pval, stime, self.regime, self.rolling_window, self.freq, self.maxiter),
+                    daemon=True,
+                )
+                process.start()
+                sender.close()
+                running[receiver] = (symbol, process, time.monotonic())
+
+            for receiver in wait(list(running), timeout=0.1):
+                symbol, process, _ = running.pop(receiver)
+                try:
+                    status, payload = receiver.recv()
+                except EOFError:
+                    status, payload = "failed", "worker exited without a result"
+                receiver.close()
+                process.join()
+                if status == "ok":
+                    results[symbol] = payload
+                else:
+                    self.failures[symbol] = payload
+
+            now = time.monotonic()
+            for receiver, (symbol, process, started) in list(running.items()):
+                if now - started > self.timeout:
+                    process.terminate()
+                    process.join()
+                    receiver.close()
+                    del running[receiver]
+                    self.failures[symbol] = "timeout"
+
+        if not results:
+            return pd.DataFrame(
+                {"regime": pd.Series(dtype="float64")},
+                index=pd.MultiIndex.from_arrays([[], []], names=["symbol", "time"]),
+            )
+        ordered = {symbol: results[symbol] for symbol in series if symbol in results}
+        return pd.concat(ordered, names=["symbol", "time"]).to_frame("regime")
@@ -0,0 +1,114 @@
+import os
+import pickle
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .indicator_cache import fingerprint
+
+
+class MarkovRegimeCache:
+    """
+    On-disk cache of fitted Markov regime models for AlgoMarkovRegressionProcessor.get_pval_rolling_window.
+
+    One file per (symbol, k_regimes, freq, rolling_window) holds the fitted parameters of both Markov fits,
+    the smoothed regime output and a fingerprint of the input series it was fitted on. A lookup is a
+    "hit" when the input is unchanged (the cached regimes are reused as-is), a "prefix" hit when the
+    cached input is an unchanged prefix of the new one (its parameters warm-start the refit), else a
+    "miss". The cache is bounded by entry count and bytes, evicting the least recently used files.
+    Methods:
+        lookup(symbol, pval, stime, k_regimes, freq, rolling_window) -> tuple:
+        store(symbol, pval, stime, k_regimes, freq, rolling_window, params, smoothed_params, regimes):
+        invalidate(symbol=None):
+    """
+
+    def __init__(self, cache_dir="markov_regime_cache", max_entries=2000, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+
+    def _path(self, symbol, k_regimes, freq, rolling_window):
+        return os.path.join(self.cache_dir, str(symbol), f"{k_regimes}_{freq}_{rolling_window}.pkl")
+
+    @staticmethod
+    def _fingerprint(pval, stime):
+        return fingerprint(np.asarray(pval, dtype=np.float64), pd.Index(stime))
+
+    def lookup(self, symbol, pval, stime, k_regimes, freq, rolling_window):
+        """
+        Find a cached fit for the given input.
+        Parameters:
+        symbol (str): The symbol the series belongs to.
+        pval (array-like): Array of p-values.
+        stime (array-like): Array of corresponding time indices.
+        k_regimes (int): Number of regimes.
+        freq (str): The frequency of the time series data.
+        rolling_window (int): Window size of the rolling mean smoothing.
+        Returns:
+        tuple: (status, entry) with status "hit", "prefix" or "miss"; entry is a dict with 'params',
+        'smoothed_params' and 'regimes', or None on a miss.
+        """
+        path = self._path(symbol, k_regimes, freq, rolling_window)
+        with self._lock:
+            try:
+                with open(path, "rb") as f:
+                    entry = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                return "miss", None
+
+            pval, stime = list(pval), list(stime)
+            n = entry["length"]
+            if len(pval) < n or self._fingerprint(pval[:n], stime[:n]) != entry["fingerprint"]:
+                return "miss", None
+
+            os.utime(path)
+            return ("hit" if len(pval) == n else "prefix"), entry
+
+    def store(self, symbol, pval, stime, k_regimes, freq, rolling_window, params, smoothed_params, regimes):
+        """
+        Persist a fit, replacing any previous entry for the same key, then enforce the size limits.
+        """
+        pval, stime = list(pval), list(stime)
+        entry = {
+            "length": len(pval),
+            "fingerprint": self._fingerprint(pval, stime),
+            "params": np.asarray(params),
+            "smoothed_params": np.asarray(smoothed_params),
+            "regimes": regimes,
+        }
+        path = self._path(symbol, k_regimes, freq, rolling_window)
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self._enforce_limits()
+
+    def invalidate(self, symbol=None):
+        """
+        Drop the cached fits of one symbol, or of every symbol when symbol is None.
+        """
+        with self._lock:
+            target = self.cache_dir if symbol is None else os.path.join(self.cache_dir, str(symbol))
+            shutil.rmtree(target, ignore_errors=True)
+
+    def _enforce_limits(self):
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.endswith(".pkl"):
+                    stat = os.stat(os.path.join(root, name))
+                    files.append((stat.st_mtime, stat.st_size, os.path.join(root, name)))
+
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        while files and (len(files) > self.max_entries or total > self.max_bytes):
+            _, size, path = files.pop(0)
+            os.remove(path)
+            total -= size
+            if not os.listdir(os.path.dirname(path)):
+                os.rmdir(os.path.dirname(path))
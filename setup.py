@@ -15,7 +15,7 @@ setup(
         "pandas",
         "clickhouse-connect",
         "statsmodels",
-        "pykalman",
+        "scipy",
         "tushare",
         "akshare",
     ],
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from breadt.algo_base_etl import AlgorithmBaseETL
+
+
+def legacy_rma(cps, days=8):
+    # the original list loop, kept as the reference for the vectorized filter
+    emas = [0 for i in range(len(cps))]
+    for i, cp in enumerate(cps):
+        if i == 0:
+            emas[i] = cp
+        else:
+            emas[i] = ((days - 1) * emas[i - 1] + 2 * cp) / (days + 1)
+    return emas
+
+
+def legacy_rma_skipping_leading_nan(column, days=8):
+    column = list(column)
+    first = next((i for i, v in enumerate(column) if not np.isnan(v)), len(column))
+    return [np.nan] * first + legacy_rma(column[first:], days)
+
+
+@pytest.fixture
+def closes():
+    rng = np.random.default_rng(7)
+    return 20 * np.exp(np.cumsum(rng.normal(0, 0.02, 500)))
+
+
+@pytest.mark.parametrize("days", [1, 2, 8, 14, 60])
+def test_rma_matches_legacy_loop_1d(closes, days):
+    np.testing.assert_allclose(AlgorithmBaseETL.rma(closes, days), legacy_rma(list(closes), days), rtol=1e-12)
+
+
+def test_rma_accepts_list_input(closes):
+    result = AlgorithmBaseETL.rma(closes.tolist(), 8)
+    assert isinstance(result, np.ndarray)
+    np.testing.assert_allclose(result, legacy_rma(closes.tolist(), 8), rtol=1e-12)
+
+
+def test_rma_2d_filters_each_column(closes):
+    panel = np.column_stack([closes, closes[::-1], closes * 0.5 + 3])
+    result = AlgorithmBaseETL.rma(panel, 8)
+    assert result.shape == panel.shape
+    for j in range(panel.shape[1]):
+        np.testing.assert_allclose(result[:, j], legacy_rma(list(panel[:, j]), 8), rtol=1e-12)
+
+
+def test_rma_skips_leading_nan_per_column(closes):
+    panel = np.column_stack([closes, closes[::-1], closes + 1.0])
+    panel[:40, 1] = np.nan
+    panel[:, 2] = np.nan
+    result = AlgorithmBaseETL.rma(panel, 8)
+
+    np.testing.assert_allclose(result[:, 0], legacy_rma(list(panel[:, 0]), 8), rtol=1e-12)
+    expected = legacy_rma_skipping_leading_nan(panel[:, 1], 8)
+    assert np.isnan(result[:40, 1]).all()
+    np.testing.assert_allclose(result[40:, 1], expected[40:], rtol=1e-12)
+    assert np.isnan(result[:, 2]).all()
+
+
+def test_rma_leading_nan_1d(closes):
+    series = closes.copy()
+    series[:5] = np.nan
+    result = AlgorithmBaseETL.rma(series, 8)
+    np.testing.assert_allclose(result, legacy_rma_skipping_leading_nan(series, 8), rtol=1e-12, equal_nan=True)
+
+
+def test_rma_empty_and_single_value():
+    assert AlgorithmBaseETL.rma([], 8).shape == (0,)
+    np.testing.assert_allclose(AlgorithmBaseETL.rma([3.5], 8), [3.5])